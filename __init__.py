@@ -111,6 +111,8 @@ def unregister():
     bpy.types.VIEW3D_MT_object.remove(objectmenu_func)
     bpy.types.VIEW3D_MT_object_context_menu.remove(objectmenu_func)
     bpy.types.VIEW3D_MT_edit_mesh_context_menu.remove(editmenu_func)
+    if bpy.app.timers.is_registered(ObjectMenu._purge_orphans):
+        bpy.app.timers.unregister(ObjectMenu._purge_orphans)
     
     # 🆕 Unregister PropertyGroup
     del bpy.types.Scene.cityjson_editor
@@ -10,25 +10,38 @@ from .Material import Material
 import time
 import json
 import copy
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class ImportContext:
+    """Read-only state shared by every ImportCityObject of one import."""
+    # list of all (scaled) vertices of the file
+    vertices: object
+    # Import-setting which lets the user choose if textures present in the CityJSON should be imported
+    textureSetting: bool
+    # entire Data of the file
+    rawObjectData: dict
+    # File to be imported
+    filepath: str
+
 
 class ImportCityObject:
     """Create Blender mesh/object instances from a CityJSON CityObject."""
 
-    def __init__(self, object, vertices, objID, textureSetting, rawObjectData, filepath, source_id=None, geom_index=0):
+    def __init__(self, ctx, object, objID, source_id=None, geom_index=0, meshData=None):
+        # shared import state (vertices, texture setting, file data, file path)
+        self.ctx = ctx
         # entire data of the object
         self.object = object
+        # precomputed Mesh.prepare() result (meshVertices, newFaces), if any
+        self.meshData = meshData
         # the object's mesh
         self.mesh = []
-        # list of all vertices
-        self.vertices = vertices
         # name/id of the object
         self.objectID = objID
         self.source_id = source_id or objID.split("__")[0]
         self.geom_index = geom_index
-        # Import-setting which lets the user choose if textures present in the CityJSON should be imported
-        # True - import textures
-        # False - do not import textures
-        self.textureSetting = textureSetting
         # materials of the object which encode the objects face semantics
         self.materials = []
         # type of the given object e.g. "Building" or "Bridge" etc.
@@ -45,10 +58,6 @@ class ImportCityObject:
             geom_lod = None
         self.objectLOD = geom_lod if geom_lod is not None else 0
         self.has_semantics = any((g.get("semantics") is not None) for g in geoms)
-        # entire Data of the file
-        self.rawObjectData = rawObjectData
-        # File to be imported
-        self.filepath = filepath
 
     # Print iterations progress
     def printProgressBar (self, iteration, total, prefix = '', suffix = '', decimals = 1, length = 100, fill = '█', printEnd = "\r",time = ''):
@@ -75,7 +84,7 @@ class ImportCityObject:
     def createMesh(self, object, vertices, oid):
         # create the objects mesh and store the data
         mesh = Mesh(object,vertices,oid)
-        self.mesh = mesh.execute()
+        self.mesh = mesh.execute(self.meshData)
 
     def createObject(self, mesh):
         # create a new object with the stored mesh
@@ -183,7 +192,7 @@ class ImportCityObject:
                 surface_idx = surfaceValue if surfaceValue is not None else 0
                 surface_idx = surface_idx if surface_idx < len(surfaces) else 0
                 surface_type = surfaces[surface_idx].get("type", "WallSurface") if surfaces else "WallSurface"
-                material = Material(surface_type, newObject, self.objectID, self.textureSetting, self.objectType, surfaceIndex, surface_idx, self.rawObjectData, self.filepath, geom )
+                material = Material(surface_type, newObject, self.objectID, self.ctx.textureSetting, self.objectType, surfaceIndex, surface_idx, self.ctx.rawObjectData, self.ctx.filepath, geom )
                 material.execute()
                 stored_value = surfaceValue if surfaceValue is not None else -1
                 try:
@@ -248,7 +257,7 @@ class ImportCityObject:
 
 
     def execute(self):
-        self.createMesh(self.object, self.vertices, self.objectID)
+        self.createMesh(self.object, self.ctx.vertices, self.objectID)
         newObject = self.createObject(self.mesh)
         # select the object
         newObject.select_set(True)
@@ -256,10 +265,10 @@ class ImportCityObject:
         # create the objects materials and assign them
         self.createMaterials(newObject)
         geoms = self.object.get('geometry') or []
-        if self.textureSetting == True and geoms:
+        if self.ctx.textureSetting == True and geoms:
             try:
                 # UV Mapping of the textures
-                self.uvMapping(newObject, self.rawObjectData, geoms[0])
+                self.uvMapping(newObject, self.ctx.rawObjectData, geoms[0])
             except:
                 if not getattr(bpy.types.Scene, "cje_warned_uv", False):
                     print("[CityJSONEditor] UV Mapping was not possible for some objects.")
@@ -268,10 +277,12 @@ class ImportCityObject:
 
 class ExportCityObject:
     """Serialize a Blender object back into a CityJSON CityObject."""
-    def __init__(self, object, lastVertexIndex, jsonExport, textureSetting, textureReferenceList):
+    def __init__(self, object, lastVertexIndex, jsonExport, textureSetting, textureReferences):
         self.object = object
         # all vertices of the current object
         self.vertices = []
+        # the same vertices as an (N, 3) float64 array
+        self.vertices_np = None
         self.objID = self.object.name
         self.export_id = self.object.get("cj_source_id", self.objID.split("__")[0])
         self.objType = self.object.get('cityJSONType', "Building")
@@ -296,7 +307,8 @@ class ExportCityObject:
         self.textureValues = []
         self.textureSetting = textureSetting
         self.counter = 0
-        self.textureReferenceList = textureReferenceList
+        # image name -> index in appearance.textures
+        self.textureReferences = textureReferences
         self.geometry_type = self.object.get("cj_geometry_type", "Solid")
         self.source_semantics = {"surfaces": []}
         try:
@@ -332,10 +344,11 @@ class ExportCityObject:
             vertexJSON.append(vertexCoordinates[2])
             vertexArray.append(vertexJSON)
         self.vertices = vertexArray
+        self.vertices_np = numpy.asarray(vertexArray, dtype=numpy.float64).reshape(-1, 3)
 
     def getObjectExtend(self):
         objGeoExtend = []
-        vertices = numpy.asarray(self.vertices)
+        vertices = self.vertices_np
         maxValue = vertices.max(axis=0, keepdims=True)[0]
         maxValue = maxValue+self.offsetArray
         minValue = vertices.min(axis=0, keepdims=True)[0]
@@ -483,10 +496,9 @@ class ExportCityObject:
                 self.textureValues.append([[None]])
                 return
             faceMaterial = img.name
-            try:
-                textureIndex =  self.textureReferenceList.index(faceMaterial)
-            except ValueError:
-                print(f"[CityJSONEditor] Image '{faceMaterial}' not found in textureReferenceList. Skipping.")
+            textureIndex = self.textureReferences.get(faceMaterial)
+            if textureIndex is None:
+                print(f"[CityJSONEditor] Image '{faceMaterial}' not found in exported textures. Skipping.")
                 self.textureValues.append([[None]])
                 return
 
@@ -35,6 +35,11 @@ class ExportCityJSON(Operator, ExportHelper):
         description="When patching, only replace CityObjects marked dirty or new; keeps others from baseline.",
         default=True,
     )
+    write_patch_only: BoolProperty(
+        name="Write changes as patch file",
+        description="With 'Export only changed objects', write only the changed CityObjects to <file>.patch.jsonl (CityJSONSeq features) instead of the full file",
+        default=False,
+    )
     skip_failed_exports: BoolProperty(
         name="Skip failed objects",
         description="If an object cannot be exported, skip it and continue; otherwise abort export",
@@ -42,5 +47,5 @@ class ExportCityJSON(Operator, ExportHelper):
     )
 
     def execute(self, context):
-        CityJSONExport = ExportProcess(self.filepath, self.texture_setting, self.skip_failed_exports, self.patch_baseline, self.export_changed_only)
+        CityJSONExport = ExportProcess(self.filepath, self.texture_setting, self.skip_failed_exports, self.patch_baseline, self.export_changed_only, self.write_patch_only)
         return CityJSONExport.execute()
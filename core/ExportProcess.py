@@ -4,27 +4,58 @@ Collects scene data, validates, and writes CityJSON 2.0.
 """
 
 import json
-import copy
+import hashlib
 import bpy
 import os
 import shutil
+import numpy as np
 from .CityObject import ExportCityObject
 from .schema import CJProps, CJExport
+from .vertex_utils import quantize_vertices, vertex_extent
+
+try:
+    # optional: not bundled with Blender, but much faster when installed
+    import orjson
+except ImportError:
+    orjson = None
+
+def _normalize_lod_val(val):
+    try:
+        return f"{float(val):g}"
+    except (ValueError, TypeError):
+        return str(val)
+
+def _file_digest(path):
+    """Content hash of a file, or None if it cannot be read."""
+    h = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.digest()
 
 class ExportProcess:
     """Handles CityJSON export from Blender objects to file."""
 
-    def __init__(self, filepath, textureSetting, skip_failed_exports=True, patch_baseline=False, export_changed_only=False):
+    def __init__(self, filepath, textureSetting, skip_failed_exports=True, patch_baseline=False, export_changed_only=False, write_patch_only=False):
         self.filepath = filepath
         self.jsonExport = None
         # True - export textures
         # False - do not export textures
         self.textureSetting = textureSetting
-        self.textureReferenceList = []
+        # image name -> index in appearance.textures (images with identical files share one index)
+        self.textureReferences = {}
         self.skip_failed_exports = skip_failed_exports
         self.patch_baseline = patch_baseline
         self.export_changed_only = export_changed_only
+        # write only <file>.patch.jsonl with the changed objects instead of the full file
+        self.write_patch_only = write_patch_only
         self.skipped_objects = []
+        self._dirty_ids = set()
+        # ids createCityObject actually exported (failed/skipped ones are left out)
+        self._exported_ids = set()
         self.baseline_data = self._load_baseline()
         if self.baseline_data is not None:
             self.keep_transform = "transform" in self.baseline_data
@@ -41,27 +72,27 @@ class ExportProcess:
             return None
         try:
             content = txt.as_string()
+            # parsed once here and reused by the no-dirty path and applyBaselinePatch
+            if orjson is not None:
+                return orjson.loads(content)
             return json.loads(content)
         except Exception:
             return None
 
     def createJSONStruct(self):
         meta = {}
-        version = "2.0.1"  # Default to 2.0.1 for better schema compatibility
         try:
-            meta = copy.deepcopy(bpy.context.scene.get("cj_metadata", {}))
+            # IDPropertyGroup.to_dict() already returns a fresh plain dict; later
+            # steps only set top-level keys on metadata, so no deepcopy is needed.
+            raw = bpy.context.scene.get("cj_metadata", {})
+            meta = raw.to_dict() if hasattr(raw, "to_dict") else dict(raw)
         except Exception:
             meta = {}
-        # Try to get the version from the scene, but upgrade if it's 2.0 or lower
-            # Use 2.0 as 2.0.1 is not supported by cjio/cjvalpy
-        version = "2.0"
-        if bpy.context.scene.get("cj_version"):
-            # We strictly use 2.0 for the exported file header for tool compatibility
-            version = "2.0"
-        
         base = {
             "type": "CityJSON",
-            "version": version,
+            # We strictly use 2.0 for the exported file header for tool compatibility
+            # (2.0.1 is not supported by cjio/cjvalpy), whatever cj_version says
+            "version": "2.0",
             "metadata": meta
         }
         if self.keep_transform:
@@ -73,35 +104,33 @@ class ExportProcess:
         base["CityObjects"] = {}
         base["vertices"] = None
         if self.textureSetting:
-            app = base.get("appearance") or {}
-            app["textures"] = []
-            app["vertices-texture"] = []
-            base["appearance"] = app
-        else:
-            if "appearance" in base:
-                del base["appearance"]
+            base["appearance"] = {"textures": [], "vertices-texture": []}
         self.jsonExport = base
     
     def _gather_objects(self):
         if self._cached_objs is not None:
             return self._cached_objs
+        # single pass over bpy.data.objects; the RNA/ID-property reads needed
+        # later (export id, dirty flag) are taken here once per object
         objs = []
         for obj in bpy.data.objects:
-            if getattr(obj, "type", "") != "MESH":
-                continue
-            if "cityJSONType" not in obj:
+            if obj.type != "MESH" or "cityJSONType" not in obj:
                 continue
             export_id = obj.get("cj_source_id", obj.name.split("__")[0])
-            objs.append((export_id, obj))
-        self._cached_objs = objs
-        return objs
+            objs.append((export_id, obj, bool(obj.get("cj_dirty", False))))
+        self._cached_objs = tuple(objs)
+        return self._cached_objs
+
+    def _collect_dirty_ids(self):
+        # ids to re-export: objects flagged dirty or not present in the baseline
+        if not (self.export_changed_only and self.baseline_data):
+            return set()
+        baseline_ids = self.baseline_data.get("CityObjects") or {}
+        return {eid for eid, _, is_dirty in self._gather_objects() if is_dirty or eid not in baseline_ids}
 
     def getMetadata(self):
-        crs = None
-        try:
-            crs = bpy.context.scene.world['CRS']
-        except Exception:
-            crs = None
+        world = bpy.context.scene.world
+        crs = world.get('CRS') if world else None
         if crs is not None:
             crs_str = str(crs).strip()
             # Basic validation for OGC CRS URLs, and skip "undefined" placeholders
@@ -112,28 +141,23 @@ class ExportProcess:
         if not self.keep_transform:
             self.jsonExport.pop("transform", None)
             return
-        try:
-            translate = [
-                bpy.context.scene.world['X_Origin'],
-                bpy.context.scene.world['Y_Origin'],
-                bpy.context.scene.world['Z_Origin'],
-            ]
-        except Exception:
-            translate = [0, 0, 0]
-        try:
-            scale = [
-                bpy.context.scene.world.get('Scale_X', 0.001),
-                bpy.context.scene.world.get('Scale_Y', 0.001),
-                bpy.context.scene.world.get('Scale_Z', 0.001),
-            ]
-        except Exception:
-            scale = [0.001, 0.001, 0.001]
+        world = bpy.context.scene.world
+        translate = [0, 0, 0]
+        scale = [0.001, 0.001, 0.001]
+        if world is not None:
+            get = world.get
+            translate = [get('X_Origin', 0), get('Y_Origin', 0), get('Z_Origin', 0)]
+            scale = [get('Scale_X', 0.001), get('Scale_Y', 0.001), get('Scale_Z', 0.001)]
         self.jsonExport.setdefault("transform", {})
         self.jsonExport["transform"]["scale"] = scale
         self.jsonExport["transform"]["translate"] = translate
 
     def getTextures(self):
         allTextures = bpy.data.images
+        # appearance folder next to the exported file, created once on first use
+        appearance_dir = os.path.join(os.path.dirname(os.path.abspath(self.filepath)), 'appearance')
+        appearance_ready = False
+        seen_files = {}
         for texture in allTextures:
             imageType = texture.file_format
             if imageType == 'TARGA':
@@ -148,6 +172,14 @@ class ExportProcess:
                 if cityjson_type == 'JPEG':
                     cityjson_type = 'JPG'
                 
+                # bpy.path.abspath resolves blend-relative "//" paths
+                src_path = bpy.path.abspath(texture.filepath)
+                digest = _file_digest(src_path)
+                if digest is not None and digest in seen_files:
+                    # same file content already exported: reuse its texture entry
+                    self.textureReferences[basename] = seen_files[digest]
+                    continue
+
                 imageName = "appearance/" + basename
                 textureJSON = {
                     "type": cityjson_type,
@@ -161,48 +193,80 @@ class ExportProcess:
                     1.0
                     ]
                 }
-                self.jsonExport['appearance']['textures'].append(textureJSON)
-                self.textureReferenceList.append(basename)
-                self.exportTextures(texture)
+                textures = self.jsonExport['appearance']['textures']
+                if digest is not None:
+                    seen_files[digest] = len(textures)
+                self.textureReferences[basename] = len(textures)
+                textures.append(textureJSON)
+                if not appearance_ready:
+                    os.makedirs(appearance_dir, exist_ok=True)
+                    appearance_ready = True
+                self.exportTextures(src_path, appearance_dir)
 
     def getVerticesTexture(self):
-        meshes = bpy.data.meshes
+        # only meshes of exported objects (shared meshes once, in object order)
+        meshes = list(dict.fromkeys(obj.data for _, obj, _ in self._gather_objects() if obj.data))
+        vertices_texture = self.jsonExport['appearance']['vertices-texture']
        
         for mesh in meshes:
             if not mesh.uv_layers:
                 print(f"[CityJSONEditor] Skipping texture export for '{mesh.name}': no UV layers.")
                 continue
-            uv_layer = mesh.uv_layers[0].data
-            for polyIndex, poly  in enumerate(mesh.polygons):
-                semantic = poly.material_index
-                if semantic >= len(mesh.materials):
-                    print(f"[CityJSONEditor] Skipping texture on poly {polyIndex} in '{mesh.name}': material index {semantic} missing.")
-                    continue
-                loopTotal = poly.loop_total
-                mat = mesh.materials[semantic]
+            poly_count = len(mesh.polygons)
+            if not poly_count:
+                continue
+            # read polygon layout and UVs in bulk instead of per loop through RNA
+            loop_start = np.empty(poly_count, dtype=np.int64)
+            loop_total = np.empty(poly_count, dtype=np.int64)
+            material_index = np.empty(poly_count, dtype=np.int64)
+            mesh.polygons.foreach_get("loop_start", loop_start)
+            mesh.polygons.foreach_get("loop_total", loop_total)
+            mesh.polygons.foreach_get("material_index", material_index)
+
+            # only materials with texture nodes contribute UVs
+            textured = []
+            for mat in mesh.materials:
                 node_tree = getattr(mat, "node_tree", None)
-                if node_tree and len(node_tree.nodes) > 2:
-                    for loop_index in range(poly.loop_start, poly.loop_start + loopTotal):
-                        uv = uv_layer[loop_index].uv
-                        u = uv[0]
-                        v = uv[1]
-                        vertices_textureJSON = [round(u,7),
-                                                round(v,7)]
-                        self.jsonExport['appearance']['vertices-texture'].append(vertices_textureJSON)
-                else:
-                    # No texture nodes; skip quietly
-                    continue
+                textured.append(bool(node_tree and len(node_tree.nodes) > 2))
+            valid = material_index < len(textured)
+            for polyIndex in np.flatnonzero(~valid).tolist():
+                print(f"[CityJSONEditor] Skipping texture on poly {polyIndex} in '{mesh.name}': material index {int(material_index[polyIndex])} missing.")
+            if not textured:
+                continue
+            selected = valid.copy()
+            selected[valid] = np.asarray(textured, dtype=bool)[material_index[valid]]
+            if not selected.any():
+                continue
+
+            starts = loop_start[selected]
+            totals = loop_total[selected]
+            # loop indices of the selected polygons, in polygon order
+            offsets = np.cumsum(totals) - totals
+            loop_indices = np.repeat(starts - offsets, totals) + np.arange(int(totals.sum()))
+
+            uv = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+            mesh.uv_layers[0].data.foreach_get("uv", uv)
+            uv = np.round(uv.reshape(-1, 2)[loop_indices].astype(np.float64), 7)
+            vertices_texture.extend(uv.tolist())
 
     def _walk_indices(self, node, func):
-        if isinstance(node, list):
-            for i, item in enumerate(node):
-                if isinstance(item, list):
-                    self._walk_indices(item, func)
-                else:
-                    try:
-                        node[i] = func(item)
-                    except Exception:
-                        pass
+        # iterative walk (Solid -> Shell -> Surface -> Ring) to avoid a Python frame per nested list;
+        # the (list, enumerate) stack visits leaves in the same order as a recursive walk
+        if not isinstance(node, list):
+            return
+        stack = [(node, enumerate(node))]
+        while stack:
+            cur, items = stack[-1]
+            for i, item in items:
+                if type(item) is list:
+                    stack.append((item, enumerate(item)))
+                    break
+                try:
+                    cur[i] = func(item)
+                except Exception:
+                    pass
+            else:
+                stack.pop()
 
     def _update_all_boundaries(self, func):
         cityobjects = self.jsonExport.get("CityObjects") or {}
@@ -213,96 +277,86 @@ class ExportProcess:
                 if isinstance(boundaries, list):
                     self._walk_indices(boundaries, func)
 
-    def _remove_duplicate_vertices(self):
-        vertices = self.jsonExport.get("vertices") or []
-        if not vertices:
-            return 0
-        index_map = [-1] * len(vertices)
-        new_vertices = []
-        seen = {}
-        for i, v in enumerate(vertices):
-            key = tuple(v)
-            existing = seen.get(key)
-            if existing is None:
-                existing = len(new_vertices)
-                seen[key] = existing
-                new_vertices.append(v)
-            index_map[i] = existing
-        self._update_all_boundaries(lambda idx: index_map[idx])
-        self.jsonExport["vertices"] = new_vertices
-        return len(vertices) - len(new_vertices)
-
-    def _remove_orphan_vertices(self):
-        vertices = self.jsonExport.get("vertices") or []
-        if not vertices:
-            return 0
-        used = {}
-        ordered = []
-
-        def collect(node):
-            if isinstance(node, list):
-                for item in node:
-                    collect(item)
-            else:
-                if not isinstance(node, int):
-                    return
-                if node < 0 or node >= len(vertices):
-                    return
-                if node not in used:
-                    used[node] = len(ordered)
-                    ordered.append(node)
-
-        cityobjects = self.jsonExport.get("CityObjects") or {}
-        for obj in cityobjects.values():
-            geoms = obj.get("geometry") or []
-            for geom in geoms:
-                boundaries = geom.get("boundaries")
-                if isinstance(boundaries, list):
-                    collect(boundaries)
+    def _duplicate_vertex_map(self, vertices):
+        """Map every vertex index to its first-seen unique vertex; returns (index_map, unique_vertices)."""
+        # np.unique sorts rows; re-rank by first occurrence so the vertex order
+        # matches a first-seen dict dedup
+        arr = np.asarray(vertices)
+        _, first_idx, inverse = np.unique(arr, axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first_idx)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        index_map = rank[inverse.reshape(-1)].tolist()
+        if isinstance(vertices, np.ndarray):
+            unique_vertices = vertices[first_idx[order]]
+        else:
+            unique_vertices = [vertices[i] for i in first_idx[order].tolist()]
+        return index_map, unique_vertices
 
-        if len(ordered) == len(vertices):
-            return 0
+    def _cleanup_vertices(self):
+        """Remove duplicate and unreferenced vertices with a single boundary walk."""
+        vertices = self.jsonExport.get("vertices")
+        if vertices is None or not len(vertices):
+            return
+        vertex_count = len(vertices)
+        index_map, unique_vertices = self._duplicate_vertex_map(vertices)
+        seen = set()
+        ordered = []
 
-        self._update_all_boundaries(lambda idx: used[idx])
-        self.jsonExport["vertices"] = [vertices[i] for i in ordered]
-        return len(vertices) - len(self.jsonExport["vertices"])
+        def dedup_and_collect(idx):
+            # out-of-range/non-int indices raise here and are left untouched by the walk
+            if idx < 0:
+                raise IndexError(idx)
+            unique_idx = index_map[idx]
+            if unique_idx not in seen:
+                seen.add(unique_idx)
+                ordered.append(unique_idx)
+            return unique_idx
 
-    def _cleanup_vertices(self):
-        removed_dupes = self._remove_duplicate_vertices()
-        removed_orphans = self._remove_orphan_vertices()
+        self._update_all_boundaries(dedup_and_collect)
+        removed_dupes = vertex_count - len(unique_vertices)
+        removed_orphans = len(unique_vertices) - len(ordered)
+        if removed_orphans:
+            # compact to referenced vertices, in first-referenced order
+            used = {idx: new_idx for new_idx, idx in enumerate(ordered)}
+            self._update_all_boundaries(lambda idx: used[idx])
+            if isinstance(unique_vertices, np.ndarray):
+                unique_vertices = unique_vertices[np.asarray(ordered, dtype=np.int64)]
+            else:
+                unique_vertices = [unique_vertices[i] for i in ordered]
+        self.jsonExport["vertices"] = unique_vertices
         if removed_dupes or removed_orphans:
             print(f"[CityJSONEditor] Cleaned vertices: -{removed_dupes} duplicates, -{removed_orphans} orphans.")
 
     def createCityObject(self):
         baseline_cityobjects = (self.baseline_data.get("CityObjects") or {}) if self.baseline_data else {}
         baseline_vertices = (self.baseline_data.get("vertices") or []) if (self.baseline_data and self.export_changed_only) else []
-        vertexArray = list(baseline_vertices)
-        blendObjects = [obj for _, obj in self._gather_objects()]
-        lastVertexIndex = len(vertexArray)
+        # quantized vertices of each exported object, concatenated once after the loop
+        vertex_chunks = []
+        lastVertexIndex = len(baseline_vertices)
         default_scale = [0.001, 0.001, 0.001] if self.keep_transform else [1, 1, 1]
         scale = (self.jsonExport.get("transform") or {}).get("scale") or default_scale
         if len(scale) != 3:
             scale = list(default_scale)
         scale = [s if s not in (None, 0) else default_scale[idx] for idx, s in enumerate(scale)]
-        grouped = copy.deepcopy(baseline_cityobjects) if baseline_cityobjects else {}
+        # Shallow copy: untouched baseline entries are carried over read-only,
+        # entries that get updated below are copied on first touch.
+        grouped = dict(baseline_cityobjects)
+        copied_ids = set()
 
         objs = self._gather_objects()
 
-        dirty_ids = set()
-        if self.export_changed_only:
-            for export_id, obj in objs:
-                dirty = obj.get("cj_dirty", False) or export_id not in baseline_cityobjects
-                if dirty:
-                    dirty_ids.add(export_id)
+        # computed once in execute
+        dirty_ids = self._dirty_ids
+        if dirty_ids:
+            objs = [o for o in objs if o[0] in dirty_ids]
 
         objs_count = len(objs)
-        for i, (export_id, object) in enumerate(objs):
-            if self.export_changed_only and dirty_ids and export_id not in dirty_ids:
-                continue
-            if i % 50 == 0:
+        for i, (export_id, object, _) in enumerate(objs):
+            if i % 500 == 0:
                 print(f"Create Export-Object {i+1}/{objs_count}: {object.name}")
             try:
-                cityobj = ExportCityObject(object, lastVertexIndex, self.jsonExport, self.textureSetting, self.textureReferenceList)
+                cityobj = ExportCityObject(object, lastVertexIndex, self.jsonExport, self.textureSetting, self.textureReferences)
                 export_id, base_obj = cityobj.execute()
             except Exception as exc:
                 if self.skip_failed_exports:
@@ -311,25 +365,30 @@ class ExportProcess:
                     continue
                 raise
             
+            self._exported_ids.add(export_id)
+            
             # 🆕 ADD PARENTS FIELD (LOD3 Window → Building relationship)
             parent_ids = object.get(CJProps.PARENT_IDS)
             if parent_ids and isinstance(parent_ids, list) and parent_ids:
                 base_obj[CJExport.PARENTS] = parent_ids
             
-            for vertex in cityobj.vertices:
-                v = list(vertex)
-                v[0] = round(v[0]/scale[0])
-                v[1] = round(v[1]/scale[1])
-                v[2] = round(v[2]/scale[2])
-                vertexArray.append(v)
+            quantized = quantize_vertices(cityobj.vertices_np, scale)
+            vertex_chunks.append(quantized)
             
             # Update lastVertexIndex for NEXT object
-            lastVertexIndex = len(vertexArray)
+            lastVertexIndex += len(quantized)
             entry = grouped.get(export_id)
             if entry is None:
                 entry = {"type": base_obj["type"], "attributes": base_obj.get("attributes", {}), "geometry": []}
                 grouped[export_id] = entry
+                copied_ids.add(export_id)
             else:
+                if export_id not in copied_ids:
+                    entry = dict(entry)
+                    entry["attributes"] = dict(entry.get("attributes") or {})
+                    entry["geometry"] = list(entry.get("geometry") or [])
+                    grouped[export_id] = entry
+                    copied_ids.add(export_id)
                 # Update attributes and type from Blender
                 entry["type"] = base_obj["type"]
                 entry.setdefault("attributes", {}).update(base_obj.get("attributes", {}))
@@ -337,117 +396,178 @@ class ExportProcess:
             # Merge geometries: replace existing LoD or append new one
             new_geoms = base_obj.get("geometry", [])
             if new_geoms:
-                if "geometry" not in entry:
-                    entry["geometry"] = []
-
-                def _normalize_lod_val(val):
-                    try:
-                        return f"{float(val):g}"
-                    except (ValueError, TypeError):
-                        return str(val)
-
+                # Replace every existing geometry of a LoD that Blender exports, then
+                # append the new ones (the last one wins if a LoD repeats)
+                new_by_lod = {}
                 for n_geo in new_geoms:
                     n_lod = _normalize_lod_val(n_geo.get("lod"))
-                    # Remove all existing geometries with matching LoD to prevent duplication
-                    entry["geometry"] = [
-                        g for g in entry["geometry"] 
-                        if _normalize_lod_val(g.get("lod")) != n_lod
-                    ]
-                    # Add current geometry from Blender
-                    entry["geometry"].append(n_geo)
-            print("lastVertexIndex "+str(lastVertexIndex))
+                    new_by_lod.pop(n_lod, None)
+                    new_by_lod[n_lod] = n_geo
+                entry["geometry"] = [
+                    g for g in entry.get("geometry") or []
+                    if _normalize_lod_val(g.get("lod")) not in new_by_lod
+                ]
+                entry["geometry"].extend(new_by_lod.values())
         self.jsonExport['version'] = '2.0'
-        self.jsonExport['vertices'] = vertexArray
+        # vertices stay an (N, 3) int64 array through cleanup/extent and are only
+        # turned into nested lists when written
+        if vertex_chunks:
+            vertices = np.concatenate(vertex_chunks, axis=0)
+        else:
+            vertices = np.empty((0, 3), dtype=np.int64)
+        if baseline_vertices:
+            baseline_arr = np.asarray(baseline_vertices)
+            if baseline_arr.ndim == 2 and baseline_arr.dtype.kind in "iu":
+                vertices = np.concatenate([baseline_arr.astype(np.int64), vertices], axis=0)
+            else:
+                # untransformed (float) baseline: keep plain lists so its values are written unchanged
+                vertices = list(baseline_vertices) + vertices.tolist()
+        self.jsonExport['vertices'] = vertices
         self.jsonExport['CityObjects'] = grouped
 
-    def exportTextures(self, texture):
-        fileSourceInfos = texture.filepath.split('\\')
-        fileSourceName = fileSourceInfos[ len(fileSourceInfos) - 1 ]
-        folderSource = texture.filepath.replace(fileSourceInfos[ len(fileSourceInfos) - 1 ],"")
-        
-        fileInfosTarget =self.filepath.split('\\')
-        folderTarget =self.filepath.replace(fileInfosTarget[ len(fileInfosTarget) - 1 ],"")
-        
-        src_path = folderSource.replace("//","") + fileSourceName
-        dst_path = folderTarget + r"appearance\\" + fileSourceName
-        
-        # create parent path for appearance
-        path = os.path.join(folderTarget, 'appearance')
-        if not os.path.exists(path):
-            os.mkdir(path)
-        shutil.copy((r'%s' %src_path), (r'%s' %dst_path))
+    def exportTextures(self, src_path, appearance_dir):
+        dst_path = os.path.join(appearance_dir, os.path.basename(src_path))
+        # copyfile copies the content only (no stat/chmod) using the OS fast-copy path
+        shutil.copyfile(src_path, dst_path)
     
     def writeData(self):
+        vertices = self.jsonExport.get("vertices")
+        if orjson is None and isinstance(vertices, np.ndarray):
+            self.jsonExport["vertices"] = vertices.tolist()
+        if orjson is not None:
+            # OPT_SERIALIZE_NUMPY writes the vertex array directly
+            with open(self.filepath, 'wb') as f:
+                f.write(orjson.dumps(self.jsonExport, option=orjson.OPT_SERIALIZE_NUMPY))
+            return
+        # stream to the file instead of building the whole string first; compact separators
         with open(self.filepath, 'w', encoding='utf-8') as f:
-            filecontent = json.dumps(self.jsonExport)
-            f.write(filecontent)
+            json.dump(self.jsonExport, f, ensure_ascii=False, separators=(',', ':'))
+
+    def writeIncremental(self):
+        """Write the changed CityObjects as CityJSONFeature lines to <file>.patch.jsonl."""
+        # CityJSONSeq layout: a header line carrying transform/metadata, then one
+        # feature per changed object with its own, locally indexed vertex list
+        patch_path = os.path.splitext(self.filepath)[0] + ".patch.jsonl"
+        vertices = self.jsonExport.get("vertices")
+        if vertices is None:
+            vertices = []
+        vertex_count = len(vertices)
+        cityobjects = self.jsonExport.get("CityObjects") or {}
+        header = {"type": "CityJSON", "version": self.jsonExport.get("version", "2.0"), "CityObjects": {}, "vertices": []}
+        for key in ("transform", "metadata"):
+            if key in self.jsonExport:
+                header[key] = self.jsonExport[key]
+        written = 0
+        with open(patch_path, 'w', encoding='utf-8') as f:
+            json.dump(header, f, ensure_ascii=False, separators=(',', ':'))
+            f.write("\n")
+            # only objects exported in this run; a failed one would otherwise
+            # be written from its stale baseline entry
+            for export_id in sorted(self._exported_ids):
+                entry = cityobjects.get(export_id)
+                if entry is None:
+                    continue
+                # geometries may still be shared with the baseline, so remap a copy
+                entry = json.loads(json.dumps(entry))
+                local = {}
+                bad_indices = []
+
+                def to_local(idx):
+                    if idx < 0 or idx >= vertex_count:
+                        bad_indices.append(idx)
+                        raise IndexError(idx)
+                    if idx not in local:
+                        local[idx] = len(local)
+                    return local[idx]
+
+                for geom in entry.get("geometry") or []:
+                    boundaries = geom.get("boundaries")
+                    if isinstance(boundaries, list):
+                        self._walk_indices(boundaries, to_local)
+                if bad_indices:
+                    err = f"vertex index {bad_indices[0]} out of range (0..{vertex_count - 1})"
+                    print(f"[CityJSONEditor] Skipping patch feature '{export_id}': {err}")
+                    self.skipped_objects.append((export_id, err))
+                    continue
+                if isinstance(vertices, np.ndarray):
+                    feature_vertices = vertices[np.fromiter(local, dtype=np.int64, count=len(local))].tolist()
+                else:
+                    feature_vertices = [vertices[idx] for idx in local]
+                feature = {
+                    "type": "CityJSONFeature",
+                    "id": export_id,
+                    "CityObjects": {export_id: entry},
+                    "vertices": feature_vertices,
+                }
+                json.dump(feature, f, ensure_ascii=False, separators=(',', ':'))
+                f.write("\n")
+                written += 1
+        print(f"[CityJSONEditor] Wrote {written} changed object(s) to {patch_path}")
 
     def updateMetadataExtent(self):
-        vertices = self.jsonExport.get("vertices") or []
-        if not vertices:
+        vertices = self.jsonExport.get("vertices")
+        if vertices is None or not len(vertices):
             return
         transform = self.jsonExport.get("transform") or {}
         scale = transform.get("scale") or [1,1,1]
         translate = transform.get("translate") or [0,0,0]
-        actual_coords = []
-        for v in vertices:
-            actual_coords.append([
-                v[0]*scale[0] + translate[0],
-                v[1]*scale[1] + translate[1],
-                v[2]*scale[2] + translate[2],
-            ])
-        if not actual_coords:
+        extent = vertex_extent(vertices, scale, translate)
+        if not extent:
             return
-        min_vals = [min(coord[i] for coord in actual_coords) for i in range(3)]
-        max_vals = [max(coord[i] for coord in actual_coords) for i in range(3)]
-        self.jsonExport.setdefault("metadata", {})["geographicalExtent"] = [
-            round(min_vals[0],3), round(min_vals[1],3), round(min_vals[2],3),
-            round(max_vals[0],3), round(max_vals[1],3), round(max_vals[2],3)
-        ]
+        self.jsonExport.setdefault("metadata", {})["geographicalExtent"] = extent
 
     def applyBaselinePatch(self):
         if not self.patch_baseline:
             return
-        baseline_txt = bpy.data.texts.get("CJE_BASELINE")
-        if not baseline_txt:
-            print("[CityJSONEditor] No baseline found; writing full export.")
-            return
-        try:
-            baseline_str = baseline_txt.as_string()
-        except Exception:
-            try:
-                baseline_str = baseline_txt.as_string()
-            except Exception:
-                baseline_str = None
-        if baseline_str is None:
-            print("[CityJSONEditor] Could not read baseline text; writing full export.")
-            return
-        try:
-            baseline = json.loads(baseline_str)
-        except Exception as exc:
-            print(f"[CityJSONEditor] Baseline JSON invalid: {exc}; writing full export.")
+        # reuse the baseline parsed in __init__ instead of parsing CJE_BASELINE again
+        if self.baseline_data is None:
+            print("[CityJSONEditor] No readable baseline found; writing full export.")
             return
         # preserve unknown keys from baseline while replacing core content
-        patched = baseline
+        # (only top-level keys are replaced, so the parsed baseline is patched in place)
+        patched = self.baseline_data
         for key in ["CityObjects", "vertices", "appearance", "transform", "metadata", "version", "type", "extensions"]:
             if key in self.jsonExport:
                 patched[key] = self.jsonExport[key]
         self.jsonExport = patched
 
+    def _report_skipped(self):
+        if self.skipped_objects:
+            print(f"[CityJSONEditor] Export skipped {len(self.skipped_objects)} object(s):")
+            for name, err in self.skipped_objects:
+                print(f" - {name}: {err}")
+
     def execute(self):
         print('##########################')
         print('### STARTING EXPORT... ###')
         print('##########################')
 
+        self._dirty_ids = self._collect_dirty_ids()
+        if self.write_patch_only and self.export_changed_only and self.baseline_data:
+            # Patch mode writes only <file>.patch.jsonl; self.filepath is never written.
+            # Textures are left out of the patch on purpose: getTextures() is not run,
+            # so texture values would point at an empty appearance.
+            self.textureSetting = False
+            self.createJSONStruct()
+            self.getMetadata()
+            self.getTransform()
+            if self._dirty_ids:
+                self.createCityObject()
+            else:
+                # createCityObject exports everything without dirty ids; write a header-only patch
+                print("[CityJSONEditor] No dirty objects; writing an empty patch.")
+            self.writeIncremental()
+            self._report_skipped()
+            print('########################')
+            print('### EXPORT FINISHED! ###')
+            print('########################')
+            return {'FINISHED'}
+
         # If nothing changed and a baseline exists, reuse it verbatim to guarantee round-trip equality.
-        baseline_cityobjects = (self.baseline_data.get("CityObjects") or {}) if self.baseline_data else {}
         if self.export_changed_only and self.baseline_data:
-            dirty = []
-            for export_id, obj in self._gather_objects():
-                if obj.get("cj_dirty", False) or export_id not in baseline_cityobjects:
-                    dirty.append(export_id)
-            if not dirty:
-                self.jsonExport = copy.deepcopy(self.baseline_data)
+            if not self._dirty_ids:
+                # only serialized, never mutated, so no copy is needed
+                self.jsonExport = self.baseline_data
                 self.writeData()
                 print("[CityJSONEditor] No dirty objects; wrote baseline without changes.")
                 print('########################')
@@ -466,10 +586,7 @@ class ExportProcess:
         self.updateMetadataExtent()
         self.applyBaselinePatch()
         self.writeData()
-        if self.skipped_objects:
-            print(f"[CityJSONEditor] Export skipped {len(self.skipped_objects)} object(s):")
-            for name, err in self.skipped_objects:
-                print(f" - {name}: {err}")
+        self._report_skipped()
 
         print('########################')
         print('### EXPORT FINISHED! ###')
@@ -4,12 +4,20 @@ Runs validation/prep, sets world transforms, and constructs Blender meshes/objec
 """
 
 import bpy
-from .CityObject import ImportCityObject, ExportCityObject
+import os
+import numpy as np
+from .CityObject import ImportCityObject, ImportContext, ExportCityObject
+from .Mesh import Mesh
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from .validation import prepare_cityjson_for_import
 
+# worker threads (large meshes only) and batch size for the bpy-free mesh preparation on import
+MESH_PREP_WORKERS = min(4, os.cpu_count() or 1)
+MESH_PREP_BATCH = 256
+
 class ImportProcess:
     """Handles reading/preparing CityJSON and instantiating Blender objects."""
 
@@ -18,7 +26,7 @@ class ImportProcess:
         self.filepath = filepath
         # Content of imported file
         self.data = []
-        # Vertices of imported files geometry for further use in blenders objects
+        # Vertices of imported files geometry for further use in blenders objects ((N, 3) float64 array once scaled)
         self.vertices = []
         # Translation parameters / world origin
         self.worldOrigin = []
@@ -28,7 +36,7 @@ class ImportProcess:
         # True - import textures
         # False - do not import textures
         self.textureSetting = textureSetting
-        # vertices before scaling
+        # vertices before scaling ((N, 3) float64 array)
         self.unScaledVertices = []
         # LoD filter set (floats) if provided
         self.lod_filter = self._parse_lod_filter(lod_filter)
@@ -61,7 +69,7 @@ class ImportProcess:
             if bbox and len(bbox) >= 6:
                 bboxXmin = bbox[0]
                 bboxYmin = bbox[1]
-                bboxZmin = min([bbox[2], bbox[5]])
+                bboxZmin = bbox[2] if bbox[2] < bbox[5] else bbox[5]
             else:
                 bboxXmin = bboxYmin = bboxZmin = 0
             translate = [bboxXmin, bboxYmin, bboxZmin]
@@ -70,38 +78,26 @@ class ImportProcess:
             scale = [1, 1, 1]
             self.scaleParam = scale
             
-            # apply transform values to all vertices
-            for vertex in self.data.get('vertices', []):
-                x = vertex[0]-bboxXmin
-                y = vertex[1]-bboxYmin
-                z = vertex[2]-bboxZmin
-                self.unScaledVertices.append([x,y,z])
+            # apply transform values to all vertices (one broadcast subtract)
+            vertices = np.asarray(self.data.get('vertices', []), dtype=np.float64).reshape(-1, 3)
+            self.unScaledVertices = vertices - np.array(translate, dtype=np.float64)
 
 
         else:
             # if it exists, use it
             print('The file has the transform property!')
             # extract coordinates of CityJSON world origin / real world offset parameters
-            for param in self.data['transform']['translate']:
-                self.worldOrigin.append(param)
+            self.worldOrigin = list(transformProperty['translate'])
             # extract scale factor for coordinate values of vertices
-            for param in self.data['transform']['scale']:
-                self.scaleParam.append(param)
+            self.scaleParam = list(transformProperty['scale'])
             # no need for processing of the vertices so they are just send along "as is "
-            for vertex in self.data['vertices']:
-                x = vertex[0]
-                y = vertex[1]
-                z = vertex[2]
-                self.unScaledVertices.append([x,y,z])           
+            self.unScaledVertices = np.asarray(self.data['vertices'], dtype=np.float64).reshape(-1, 3)
             
 
     def scaleVertexCoordinates(self):
-        # apply scale factor to vertices
-        for vertex in self.unScaledVertices:
-            x = round(vertex[0]*self.scaleParam[0],3)
-            y = round(vertex[1]*self.scaleParam[1],3)
-            z = round(vertex[2]*self.scaleParam[2],3)
-            self.vertices.append([x,y,z])
+        # apply scale factor to all vertices at once (broadcast (N, 3) * (3,))
+        unscaled = np.asarray(self.unScaledVertices, dtype=np.float64).reshape(-1, 3)
+        self.vertices = np.round(unscaled * np.asarray(self.scaleParam, dtype=np.float64), 3)
 
     def checkImport(self):
         # checks if this is the first imported CityJSON file
@@ -113,35 +109,12 @@ class ImportProcess:
             return True
         else: 
             print('This is NOT the first file!')
-            # load the x-origin set in the project
-            establishedX = bpy.context.scene.world['X_Origin']
-            # load the x-origin of the import file
-            currentX = self.worldOrigin[0]
-            # calculate the difference
-            deltaX = currentX - establishedX
-            # apply the difference to all coordinates
-            for vertex in self.vertices:
-                vertex[0] = vertex[0] + deltaX
-            
-            # load the y-origin set in the project
-            establishedY = bpy.context.scene.world['Y_Origin']
-            # load the y-origin of the import file
-            currentY = self.worldOrigin[1]
-            # calculate the difference
-            deltaY = currentY - establishedY
-            # apply the difference to all coordinates
-            for vertex in self.vertices:
-                vertex[1] = vertex[1] + deltaY
-
-            # load the z-origin set in the project
-            establishedZ = bpy.context.scene.world['Z_Origin']
-            # load the z-origin of the import file
-            currentZ = self.worldOrigin[2]
-            # calculate the difference
-            deltaZ = currentZ - establishedZ
-            # apply the difference to all coordinates
-            for vertex in self.vertices:
-                vertex[2] = vertex[2] + deltaZ
+            world = bpy.context.scene.world
+            # offset between the origin of this file and the origin set in the project
+            established = np.array([world['X_Origin'], world['Y_Origin'], world['Z_Origin']], dtype=np.float64)
+            delta = np.asarray(self.worldOrigin[:3], dtype=np.float64) - established
+            # apply the difference to all coordinates in one pass
+            self.vertices += delta
             return False
 
     def createWorldProperties(self):
@@ -156,14 +129,9 @@ class ImportProcess:
         bpy.context.scene.world['Scale_Z'] = self.scaleParam[2] if len(self.scaleParam) > 2 else 0.001
         print("World parameters have been set!")
 
-    def createCityObjects(self):
-        # create the CityObjects with coresponding meshesS
-        cityobjects = self.data.get('CityObjects') or {}
-        objs_count = len(cityobjects)
+    def _importJobs(self, cityobjects):
+        """Yield (objIndex, objID, object, obj_name, geom_index) for every Blender object to create, in file order."""
         for i, (objID, object) in enumerate(cityobjects.items()):
-            if i % 50 == 0:
-                print(f'Creating object {i+1}/{objs_count}: {objID}')
-            base_attrs = object.get("attributes") or {}
             geoms = (object.get("geometry") or [])
             if self.lod_strategy == "HIGHEST" and geoms:
                 max_lod = max(float(g.get("lod", 0.0)) for g in geoms)
@@ -173,24 +141,64 @@ class ImportProcess:
             if not geoms:
                 # User wants to preserve structural/placeholder objects.
                 # Create an object with no LoD geometry.
-                obj_name = f"{objID}__placeholder"
-                cityobj = ImportCityObject(object, self.vertices, obj_name, self.textureSetting, self.data, self.filepath, source_id=objID, geom_index=-1)
-                try:
-                    cityobj.execute()
-                except RuntimeError as exc:
-                    print(f"[CityJSONEditor] Warning: failed to import placeholder '{objID}': {exc}")
+                yield i, objID, object, f"{objID}__placeholder", -1
                 continue
-            import copy as _copy
             for g_idx, geom in enumerate(geoms):
-                filtered = _copy.deepcopy(object)
+                # shallow copy: only "geometry" differs per variant, the rest is read-only downstream
+                filtered = dict(object)
                 filtered["geometry"] = [geom]
                 geom_lod = geom.get("lod", 0)
-                obj_name = f"{objID}__lod{geom_lod}__g{g_idx}"
-                cityobj = ImportCityObject(filtered, self.vertices, obj_name, self.textureSetting, self.data, self.filepath, source_id=objID, geom_index=g_idx)
-                try:
-                    cityobj.execute()
-                except RuntimeError as exc:
-                    raise RuntimeError(f"Failed to import CityObject '{objID}' geometry {g_idx}: {exc}") from exc
+                yield i, objID, filtered, f"{objID}__lod{geom_lod}__g{g_idx}", g_idx
+
+    def _extractMesh(self, job):
+        # face extraction is pure Python (GIL-bound), so it stays on the main thread
+        try:
+            mesh = Mesh(job[2], self.vertices, job[3])
+            mesh.extractVertexMapping()
+            return mesh, mesh.usesArrayRemap()
+        except Exception:
+            # let ImportCityObject redo it and raise in the usual place
+            return None, False
+
+    def _remapMesh(self, mesh):
+        # may run on a worker thread: pure Python/NumPy only, no bpy access
+        try:
+            return mesh.remap()
+        except Exception:
+            return None
+
+    def createCityObjects(self):
+        # create the CityObjects with coresponding meshesS
+        cityobjects = self.data.get('CityObjects') or {}
+        objs_count = len(cityobjects)
+        jobs = list(self._importJobs(cityobjects))
+        ctx = ImportContext(self.vertices, self.textureSetting, self.data, self.filepath)
+        # Only meshes that take the NumPy remap (which releases the GIL) go to the
+        # pool; small ones use the dict remap, which holds the GIL, and are prepared
+        # inline. Every bpy call stays on the main thread; batches bound how many
+        # prepared meshes are held.
+        with ThreadPoolExecutor(max_workers=MESH_PREP_WORKERS) as pool:
+            for start in range(0, len(jobs), MESH_PREP_BATCH):
+                batch = jobs[start:start + MESH_PREP_BATCH]
+                extracted = [self._extractMesh(job) for job in batch]
+                futures = [pool.submit(self._remapMesh, mesh) if threaded else None for mesh, threaded in extracted]
+                for (i, objID, object, obj_name, g_idx), (mesh, _), future in zip(batch, extracted, futures):
+                    if future is not None:
+                        meshData = future.result()
+                    elif mesh is not None:
+                        meshData = self._remapMesh(mesh)
+                    else:
+                        meshData = None
+                    if i % 50 == 0 and g_idx <= 0:
+                        print(f'Creating object {i+1}/{objs_count}: {objID}')
+                    cityobj = ImportCityObject(ctx, object, obj_name, source_id=objID, geom_index=g_idx, meshData=meshData)
+                    try:
+                        cityobj.execute()
+                    except RuntimeError as exc:
+                        if g_idx < 0:
+                            print(f"[CityJSONEditor] Warning: failed to import placeholder '{objID}': {exc}")
+                            continue
+                        raise RuntimeError(f"Failed to import CityObject '{objID}' geometry {g_idx}: {exc}") from exc
         print('All CityObjects have been created!')
 
     def execute(self):
@@ -3,6 +3,11 @@ Mesh builder: converts CityJSON geometry boundaries into Blender meshes.
 """
 
 import bpy
+import numpy as np
+from itertools import chain
+
+# below this many face-vertex references the dict remap is faster than np.unique
+ARRAY_REMAP_MIN_REFS = 256
 
 class Mesh:
     """Builds a Blender mesh object from CityJSON geometry boundaries."""
@@ -51,16 +56,18 @@ class Mesh:
                     else:
                         self.vertexMaps.append(face)
     
-    def createBlenderMesh(self):
+    def remapFaces(self):
+        """Dict-based remap of CityJSON vertex indices to local mesh indices; returns (meshVertices, newFaces)."""
         # vertices used for defining blender meshes
         meshVertices = []
-        # edges defined by vertex indices (not required if faces are made)
-        edges = []
         # new face mapping values
         newFaces = []
         
         # Mapping from global vertex coordinates to local mesh index
         coord_to_idx = {}
+        # Mapping from CityJSON vertex index to local mesh index, so repeated
+        # references skip the coordinate lookup
+        index_map = {}
         
         # only use vertices, that are part of the mesh
         for face in self.vertexMaps:
@@ -69,20 +76,82 @@ class Mesh:
             # check vertex coordinate in face
             for value in face:
                 try:
-                    vertexCoords = tuple(self.vertices[value])
-                except (IndexError, TypeError):
+                    new_idx = index_map.get(value)
+                except TypeError:
+                    # unhashable (malformed) index
                     continue
-                
-                if vertexCoords in coord_to_idx:
-                    newFace.append(coord_to_idx[vertexCoords])
-                else:
-                    new_idx = len(meshVertices)
-                    meshVertices.append(list(vertexCoords))
-                    coord_to_idx[vertexCoords] = new_idx
-                    newFace.append(new_idx)
+                if new_idx is None:
+                    try:
+                        vertexCoords = tuple(self.vertices[value])
+                    except (IndexError, TypeError):
+                        continue
+                    # distinct indices with identical coordinates still share one mesh vertex
+                    new_idx = coord_to_idx.get(vertexCoords)
+                    if new_idx is None:
+                        new_idx = len(meshVertices)
+                        meshVertices.append(list(vertexCoords))
+                        coord_to_idx[vertexCoords] = new_idx
+                    index_map[value] = new_idx
+                newFace.append(new_idx)
             # add the newly mapped face to the list of faces for the mesh
             if len(newFace) >= 3:
                 newFaces.append(newFace)
+        return meshVertices, newFaces
+
+    def remapFacesArray(self):
+        """Same remap as remapFaces with np.unique; returns None if the input needs the dict path."""
+        vertices = self.vertices
+        if not isinstance(vertices, np.ndarray):
+            return None
+        try:
+            lengths = np.fromiter(map(len, self.vertexMaps), dtype=np.int64, count=len(self.vertexMaps))
+            flat = np.fromiter(chain.from_iterable(self.vertexMaps), dtype=np.int64, count=int(lengths.sum()))
+        except (TypeError, ValueError, OverflowError):
+            # non-integer (malformed) indices
+            return None
+        if len(flat) < ARRAY_REMAP_MIN_REFS:
+            # per-call NumPy overhead outweighs the gain on small meshes
+            return None
+        vertex_count = len(vertices)
+        # drop out-of-range references like the dict path does; negative ones wrap like list indexing
+        valid = (flat >= -vertex_count) & (flat < vertex_count)
+        coords = vertices[flat[valid]]
+        if not len(coords):
+            return [], []
+        # dedup by coordinate; np.unique sorts rows, so re-rank by first occurrence
+        _, first_idx, inverse = np.unique(coords, axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first_idx)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        local = rank[inverse.reshape(-1)]
+        meshVertices = coords[first_idx[order]]
+
+        # split the remapped indices back into faces, keeping those with >= 3 vertices
+        face_ids = np.repeat(np.arange(len(lengths)), lengths)[valid]
+        counts = np.bincount(face_ids, minlength=len(lengths))
+        newFaces = [face for face, count in zip(np.split(local, np.cumsum(counts)[:-1]), counts.tolist()) if count >= 3]
+        return meshVertices, [face.tolist() for face in newFaces]
+
+    def usesArrayRemap(self):
+        """True when remap() takes the NumPy path; call after extractVertexMapping()."""
+        return isinstance(self.vertices, np.ndarray) and sum(map(len, self.vertexMaps)) >= ARRAY_REMAP_MIN_REFS
+
+    def remap(self):
+        """Remap the extracted faces (bpy-free); returns (meshVertices, newFaces)."""
+        remapped = self.remapFacesArray()
+        if remapped is None:
+            remapped = self.remapFaces()
+        return remapped
+
+    def prepare(self):
+        """bpy-free part of the build (safe to run off the main thread); returns (meshVertices, newFaces)."""
+        self.extractVertexMapping()
+        return self.remap()
+
+    def createBlenderMesh(self, prepared):
+        # edges defined by vertex indices (not required if faces are made)
+        edges = []
+        meshVertices, newFaces = prepared
 
         # creating a new mesh with the name of the object
         newMesh = bpy.data.meshes.new(self.name)
@@ -91,7 +160,9 @@ class Mesh:
         # return the mesh so it can be handed over to the object  
         return newMesh    
         
-    def execute(self):
-        self.extractVertexMapping()
-        mesh = self.createBlenderMesh()
+    def execute(self, prepared=None):
+        # prepared: result of prepare(), e.g. computed on a worker thread
+        if prepared is None:
+            prepared = self.prepare()
+        mesh = self.createBlenderMesh(prepared)
         return mesh
@@ -1,17 +1,26 @@
 import bpy
+import numpy as np
+from idprop.types import IDPropertyArray, IDPropertyGroup
 from .FeatureTypes import FeatureTypes
 from .Material import Material
-import math
 
 
 def id_prop_to_dict(value):
     """
     Recursively convert Blender ID properties to plain Python types.
     """
+    # fast paths for the common leaf/container types before any hasattr probing
+    if value is None or isinstance(value, (str, int, float)):
+        return value
     if isinstance(value, dict):
         return {k: id_prop_to_dict(v) for k, v in value.items()}
     elif isinstance(value, (list, tuple)):
         return [id_prop_to_dict(item) for item in value]
+    elif isinstance(value, IDPropertyGroup):
+        # to_dict() already converts nested groups/arrays
+        return value.to_dict()
+    elif isinstance(value, IDPropertyArray):
+        return value.to_list()
     elif hasattr(value, 'to_dict'):
         return id_prop_to_dict(value.to_dict())
     elif hasattr(value, '__iter__') and not isinstance(value, (str, bytes)):
@@ -23,6 +32,49 @@ def id_prop_to_dict(value):
         return value
 
 
+# feature type names for the Construction submenu; static, so computed once per session
+_FEATURE_LIST = None
+
+
+def _get_features():
+    global _FEATURE_LIST
+    if _FEATURE_LIST is None:
+        _FEATURE_LIST = tuple(FeatureTypes().getAllFeatures())
+    return _FEATURE_LIST
+
+
+# orphans_purge walks the whole blend file; semantics runs on several objects
+# in a row share one purge, deferred by a short timer
+ORPHAN_PURGE_DELAY = 0.5
+_purge_pending = False
+
+
+def _purge_orphans():
+    global _purge_pending
+    _purge_pending = False
+    try:
+        bpy.ops.outliner.orphans_purge(do_local_ids=True, do_linked_ids=False, do_recursive=True)
+    except RuntimeError as e:
+        print(f"[CityJSONEditor] WARNING: Orphan purge skipped: {e}")
+    # one-shot timer
+    return None
+
+
+def schedule_orphan_purge():
+    """Purge orphan data-blocks once, shortly after the last request."""
+    global _purge_pending
+    if not _purge_pending:
+        _purge_pending = True
+        bpy.app.timers.register(_purge_orphans, first_interval=ORPHAN_PURGE_DELAY)
+
+
+def objects_for_source(scene, source_id):
+    """Objects in scene that share cj_source_id."""
+    # a direct scan: a cached index has no reliable invalidation signal
+    # (retagged or swapped objects keep the object count unchanged)
+    return [obj for obj in scene.objects if obj.get("cj_source_id") == source_id]
+
+
 class SetAttributes(bpy.types.Operator):
     bl_idname = "wm.set_attributes"
     bl_label = "SetAttributes"
@@ -52,15 +104,16 @@ class VIEW3D_MT_cityobject_construction_submenu(bpy.types.Menu):
         layout = self.layout
         layout.label(text="Construction")
 
-        ft = FeatureTypes()
-        list = ft.getAllFeatures()
-        
-        for feature in list:
-            layout.operator(SetConstructionOperator.bl_idname, text=feature).cityJSONType = feature
+        op_id = SetConstructionOperator.bl_idname
+        add_operator = layout.operator
+        for feature in _get_features():
+            add_operator(op_id, text=feature).cityJSONType = feature
 
 class CalculateSemanticsOperator(bpy.types.Operator):
     bl_idname = "wm.calc_semantics"
     bl_label = "CalculateSemantics"
+    # one undo step for the whole run; nested mode switches don't push their own
+    bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
         
@@ -74,6 +127,9 @@ class CalculateSemanticsOperator(bpy.types.Operator):
             self.report({'ERROR'}, "Selected object is not a mesh.")
             return {'CANCELLED'}
 
+        # edits made in EDIT mode are written back by the mode switch below
+        left_edit_mode = obj.mode == 'EDIT'
+
         # if initial attributes are not already set, do so now
         try: 
             if obj.mode != 'OBJECT':
@@ -84,46 +140,62 @@ class CalculateSemanticsOperator(bpy.types.Operator):
             obj['cityJSONType'] = "Building"
             obj['LOD'] = 2 
         
-        def materialCreator(surfaceType,matSlot,faceIndex):
-            mat = Material(type=surfaceType, newObject=obj, objectID=obj.id_data.name, textureSetting=False, objectType=obj['cityJSONType'], surfaceIndex=None, surfaceValue=None, filepath=None, rawObjectData=None, geometry=None)
-            mat.createMaterial()
-            mat.setColor()
-            mat.assignMaterials(faceIndex, matSlot)
-            del mat
+        # surface type -> material slot; one material per type, shared by its faces
+        typeSlots = {}
+
+        def materialSlot(surfaceType):
+            slot = typeSlots.get(surfaceType)
+            if slot is None:
+                mat = Material(type=surfaceType, newObject=obj, objectID=object_id, textureSetting=False, objectType=object_type, surfaceIndex=None, surfaceValue=None, filepath=None, rawObjectData=None, geometry=None)
+                mat.createMaterial()
+                mat.setColor()
+                slot = len(typeSlots)
+                typeSlots[surfaceType] = slot
+            return slot
 
         def materialCleaner():
             bpy.ops.object.mode_set(mode='OBJECT')
-            for face in obj.data.polygons:
-                matIndex = face.material_index
-                bpy.context.object.active_material_index = matIndex
-                bpy.ops.object.material_slot_remove()
+            # drop all slots through the data API instead of one material_slot_remove operator per face
+            polygons = obj.data.polygons
+            polygons.foreach_set("material_index", np.zeros(len(polygons), dtype=np.int32))
+            obj.data.materials.clear()
             # bpy.ops.object.mode_set(mode='EDIT')   
-            bpy.ops.outliner.orphans_purge(do_local_ids=True, do_linked_ids=False, do_recursive=True)
+            # the released materials are purged once the operator calls have settled
+            schedule_orphan_purge()
 
         obj = context.object
         if obj.mode != 'OBJECT':
              bpy.ops.object.mode_set(mode='OBJECT')
         mesh = obj.data
-        mesh.update()
+        polygons = mesh.polygons
+        if not len(polygons):
+            self.report({'WARNING'}, "Selected mesh has no polygons.")
+            return {'CANCELLED'}
+        # read once for materialSlot instead of per created material
+        object_type = obj['cityJSONType']
+        object_id = obj.id_data.name
+        # the operator only reads normals and writes an attribute; a full update is
+        # only needed for geometry just written back from EDIT mode or missing normals
+        if left_edit_mode or polygons[0].normal.length == 0.0:
+            mesh.update()
         
         # Get or create semantic attribute - DON'T DELETE existing one!
+        # The mesh is in OBJECT mode and up to date, so only a real mismatch needs a rebuild
+        face_count = len(mesh.polygons)
         attr = mesh.attributes.get("cje_semantic_index")
-        if attr is None:
-            print("[CityJSONEditor] Creating new semantic attribute...")
-            attr = mesh.attributes.new(name="cje_semantic_index", type='INT', domain='FACE')
-        else:
+        if (attr is not None and attr.domain == 'FACE' and attr.data_type == 'INT'
+                and len(attr.data) == face_count):
             print(f"[CityJSONEditor] Using existing semantic attribute (preserving Window/Door faces)")
-        
-        # Verify attribute validity
-        if len(attr.data) != len(mesh.polygons):
-             # Size mismatch - need to recreate
-             print(f"[CityJSONEditor] WARNING: Attribute size mismatch - recreating")
-             mesh.update()
-             mesh.attributes.remove(attr)
-             attr = mesh.attributes.new(name="cje_semantic_index", type='INT', domain='FACE')
-             if len(attr.data) != len(mesh.polygons):
-                 self.report({'ERROR'}, f"Mesh attribute mismatch: {len(attr.data)} vs {len(mesh.polygons)}. Try regularizing geometry.")
-                 return {'CANCELLED'}
+        else:
+            if attr is not None:
+                print(f"[CityJSONEditor] WARNING: Attribute size/type mismatch - recreating")
+                mesh.attributes.remove(attr)
+            else:
+                print("[CityJSONEditor] Creating new semantic attribute...")
+            attr = mesh.attributes.new(name="cje_semantic_index", type='INT', domain='FACE')
+            if len(attr.data) != face_count:
+                self.report({'ERROR'}, f"Mesh attribute mismatch: {len(attr.data)} vs {face_count}. Try regularizing geometry.")
+                return {'CANCELLED'}
 
         surfaces = list(obj.get("cj_semantic_surfaces", []))
         
@@ -164,44 +236,71 @@ class CalculateSemanticsOperator(bpy.types.Operator):
         print(f"[CityJSONEditor] ========================================\n")
         
         materialCleaner()
-        matSlot = 0
-        for faceIndex, face in enumerate(obj.data.polygons):
-            # Check if this face was a Window/Door - preserve it
-            if faceIndex in preserved_semantics:
-                old_idx = preserved_semantics[faceIndex]
-                surfaceType = surfaces[old_idx].get("type", "WallSurface")
-                print(f"[CityJSONEditor] Face {faceIndex}: PRESERVED as {surfaceType} (idx={old_idx})")
-                materialCreator(surfaceType, matSlot, faceIndex)
-                attr.data[faceIndex].value = old_idx
-                matSlot += 1
-                continue
-            
-            # Calculate semantic type based on normal
-            if math.isclose(face.normal[2] ,-1.0):
-                surfaceType = "GroundSurface"
-                materialCreator(surfaceType,matSlot,faceIndex)
-                matSlot+=1
-            elif math.isclose(face.normal[2],0,abs_tol=1e-3) or ((face.normal[2] < 0) and (math.isclose(face.normal[2],-1.0) == False)):
-                surfaceType = "WallSurface"
-                materialCreator(surfaceType,matSlot,faceIndex)
-                matSlot+=1
-            else:
-                surfaceType = "RoofSurface"
-                materialCreator(surfaceType,matSlot,faceIndex)
-                matSlot+=1
-            # map semantics list and attribute
-            surface_idx = None
-            for idx, surf in enumerate(surfaces):
-                if isinstance(surf, dict) and surf.get("type") == surfaceType:
-                    surface_idx = idx
-                    break
+        polygons = obj.data.polygons
+        face_count = len(polygons)
+        # classify all faces from the z component of their normals in one pass
+        normals = np.empty(face_count * 3, dtype=np.float32)
+        polygons.foreach_get("normal", normals)
+        # strided view of the z components (no copy); float64 scalars make the
+        # comparisons upcast per element, matching the scalar float tests
+        nz = normals[2::3]
+        # ground: math.isclose(nz, -1.0), which for float32 normals is exact equality
+        # (the nearest float32 neighbours of -1.0 are further than 1e-9 away);
+        # otherwise anything not facing up by more than 1e-3 is a wall
+        # (covers both |nz| <= 1e-3 and downward-facing faces)
+        ground = nz == -1.0
+        labels = np.where(nz <= np.float64(1e-3), np.int32(1), np.int32(2))
+        labels[ground] = 0
+        surface_types = ("GroundSurface", "WallSurface", "RoofSurface")
+
+        # Window/Door faces keep their semantic index; all others are classified
+        free = np.ones(face_count, dtype=bool)
+        if preserved_semantics:
+            free[list(preserved_semantics)] = False
+
+        # surface type -> index of its first entry in surfaces
+        type_to_surface = {}
+        for idx, surf in enumerate(surfaces):
+            if isinstance(surf, dict):
+                type_to_surface.setdefault(surf.get("type"), idx)
+        # label -> surface index lookup table; missing types are appended to surfaces
+        # in order of the first face that uses them
+        lut = np.zeros(len(surface_types), dtype=np.int32)
+        present, first_face = np.unique(labels[free], return_index=True)
+        for label in present[np.argsort(first_face)].tolist():
+            surfaceType = surface_types[label]
+            surface_idx = type_to_surface.get(surfaceType)
             if surface_idx is None:
                 surface_idx = len(surfaces)
                 surfaces.append({"type": surfaceType})
-            attr.data[faceIndex].value = surface_idx
+                type_to_surface[surfaceType] = surface_idx
+            lut[label] = surface_idx
+        values = lut[labels]
+        for faceIndex, old_idx in preserved_semantics.items():
+            values[faceIndex] = old_idx
+        attr.data.foreach_set("value", values)
+
+        # material slots: give every face a surface type code (classified labels,
+        # then one code per preserved type), create one material per code in order
+        # of first use and write all slots with one foreach_set
+        code_types = list(surface_types)
+        codes = labels.copy()
+        for faceIndex, old_idx in preserved_semantics.items():
+            surfaceType = surfaces[old_idx].get("type", "WallSurface")
+            print(f"[CityJSONEditor] Face {faceIndex}: PRESERVED as {surfaceType} (idx={old_idx})")
+            if surfaceType not in code_types:
+                code_types.append(surfaceType)
+            codes[faceIndex] = code_types.index(surfaceType)
+        slot_lut = np.zeros(len(code_types), dtype=np.int32)
+        used_codes, first_face = np.unique(codes, return_index=True)
+        for code in used_codes[np.argsort(first_face)].tolist():
+            slot_lut[code] = materialSlot(code_types[code])
+        slots = slot_lut[codes]
+        polygons.foreach_set("material_index", slots)
         
-        # Store as JSON (avoid ID property corruption)
-        surfaces_clean = id_prop_to_dict(surfaces)
+        # Store as plain data (avoid ID property corruption); surfaces was converted
+        # above and only plain dicts were appended since, so no second conversion
+        surfaces_clean = surfaces
         obj["cj_semantic_surfaces"] = surfaces_clean
         obj["cj_dirty"] = True
         
@@ -219,13 +318,13 @@ class SetActiveLODOperator(bpy.types.Operator):
 
     def execute(self, context):
         active = context.active_object
-        if active is None or "cj_source_id" not in active:
+        # the importer always stores cj_source_id, so there is no name-based fallback
+        source_id = active.get("cj_source_id") if active is not None else None
+        if source_id is None:
             self.report({'WARNING'}, "Select a CityJSON object to switch LoD.")
             return {'CANCELLED'}
-        source_id = active.get("cj_source_id", active.name.split("__")[0])
-        for obj in context.scene.objects:
-            if obj.get("cj_source_id") == source_id:
-                obj.hide_set(obj.get("cj_lod") != self.lod)
+        for obj in objects_for_source(context.scene, source_id):
+            obj.hide_set(obj.get("cj_lod") != self.lod)
         return {'FINISHED'}
 
 class VIEW3D_MT_cityobject_lod_submenu(bpy.types.Menu):
@@ -234,13 +333,13 @@ class VIEW3D_MT_cityobject_lod_submenu(bpy.types.Menu):
     def draw(self, context):
         layout = self.layout
         active = context.active_object
-        if active is None or "cj_source_id" not in active:
+        source_id = active.get("cj_source_id") if active is not None else None
+        if source_id is None:
             layout.label(text="No CityJSON object selected")
             return
-        source_id = active.get("cj_source_id", active.name.split("__")[0])
         lods = set()
-        for obj in context.scene.objects:
-            if obj.get("cj_source_id") == source_id and "cj_lod" in obj:
+        for obj in objects_for_source(context.scene, source_id):
+            if "cj_lod" in obj:
                 lods.add(obj.get("cj_lod"))
         for lod_val in sorted(lods):
             layout.operator(SetActiveLODOperator.bl_idname, text=f"LoD {lod_val}").lod = float(lod_val)
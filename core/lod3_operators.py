@@ -8,49 +8,63 @@ Based on CityJSON 2.0 spec and FZK_LOD3 örneği.
 """
 
 import bpy
-import bmesh
 import gpu
 import uuid
-from gpu_extras.batch import batch_for_shader
-from mathutils import Vector
+import numpy as np
+from mathutils import Matrix
 from bpy.types import Operator
 from bpy.props import IntProperty, FloatVectorProperty
 
 from .schema import CJProps, CJTypes
 from .lod3_utils import (
     get_face_ortho_matrix,
+    invert_ortho_affine,
     mouse_to_face_local_coords,
     calculate_rectangle_dimensions,
     validate_wall_face,
-    get_building_source_id
+    prime_face_cache,
+    clear_face_cache
 )
 from .Material import Material
+from .ObjectMenu import id_prop_to_dict
 
+# step-by-step trace of window placement; errors and warnings are always printed
+_DEBUG = False
 
-def id_prop_to_dict(value):
+
+def _dprint(*args, **kwargs):
+    if _DEBUG:
+        print(*args, **kwargs)
+
+
+# Event types the window placement modal reacts to
+_MODAL_EVENTS = frozenset({'MOUSEMOVE', 'LEFTMOUSE', 'RIGHTMOUSE', 'ESC'})
+
+# Face-local movement (m) below which a MOUSEMOVE doesn't update the preview
+_PREVIEW_MOVE_EPS = 1e-6
+
+# Alpha below one 8-bit step draws nothing visible
+_MIN_VISIBLE_ALPHA = 1.0 / 255.0
+
+# Preview rectangle corners 0-3 (bottom-left, bottom-right, top-right, top-left)
+_PREVIEW_OUTLINE_INDICES = ((0, 1), (1, 2), (2, 3), (3, 0))
+_PREVIEW_FILL_INDICES = ((0, 1, 2), (0, 2, 3))
+
+
+def _rect_corners_world(matrix_np, u0, v0, u1, v1):
     """
-    Recursively convert Blender ID properties to plain Python types.
+    World-space corners of an axis-aligned rectangle in face-local coordinates.
     
-    Handles nested dicts, lists, and primitive types.
+    Corners come out bottom-left, bottom-right, top-right, top-left as a (4, 3)
+    array; all four are transformed by a single matmul.
     """
-    if isinstance(value, dict):
-        # Convert dict-like ID properties
-        return {k: id_prop_to_dict(v) for k, v in value.items()}
-    elif isinstance(value, (list, tuple)):
-        # Convert list/tuple elements
-        return [id_prop_to_dict(item) for item in value]
-    elif hasattr(value, 'to_dict'):
-        # Blender ID property with to_dict method
-        return id_prop_to_dict(value.to_dict())
-    elif hasattr(value, '__iter__') and not isinstance(value, (str, bytes)):
-        # Other iterables (but not strings)
-        try:
-            return [id_prop_to_dict(item) for item in value]
-        except TypeError:
-            return value
-    else:
-        # Primitive type (int, float, str, bool, None)
-        return value
+    corners_h = np.array((
+        (u0, u1, u1, u0),
+        (v0, v0, v1, v1),
+        (0.0, 0.0, 0.0, 0.0),
+        (1.0, 1.0, 1.0, 1.0),
+    ))
+    return (matrix_np @ corners_h)[:3].T
 
 
 class CITYJSON_OT_place_window_modal(Operator):
@@ -64,6 +78,8 @@ class CITYJSON_OT_place_window_modal(Operator):
     # State variables (operator properties)
     _building_obj = None  # Internal reference (not a property)
     _face_matrix = None   # Internal 4x4 Matrix
+    _face_matrix_np = None  # Same matrix as a NumPy array for batched corner transforms
+    _face_matrix_inv = None  # Inverse of _face_matrix, for world -> face-local mouse hits
     
     target_face_idx: IntProperty(
         name="Target Face",
@@ -108,6 +124,11 @@ class CITYJSON_OT_place_window_modal(Operator):
     )
     
     _draw_handle = None  # GPU draw handler (not a property)
+    _preview_key = None  # (first, current) corner points the cached preview batches were built for
+    _preview_batches = None  # (outline, fill) GPU batches reused while the rectangle is unchanged
+    _cached_shader = None  # builtin UNIFORM_COLOR shader, fetched on first draw
+    _preview_format = None  # vertex format and index buffers shared by every preview, built on first draw
+    _preview_ibos = None
     
     @classmethod
     def poll(cls, context):
@@ -149,14 +170,17 @@ class CITYJSON_OT_place_window_modal(Operator):
         
         # Validation 2: Get selected face (must switch to Object mode to read selection)
         bpy.ops.object.mode_set(mode='OBJECT')
-        selected_faces = [f.index for f in obj.data.polygons if f.select]
+        polygons = obj.data.polygons
+        selected = np.empty(len(polygons), dtype=bool)
+        polygons.foreach_get("select", selected)
+        selected_faces = np.flatnonzero(selected)
         
         if len(selected_faces) != 1:
             self.report({'ERROR'}, "Select exactly one wall face")
             bpy.ops.object.mode_set(mode='EDIT')  # Restore edit mode before returning
             return {'CANCELLED'}
         
-        face_idx = selected_faces[0]
+        face_idx = int(selected_faces[0])
         
         # Validation 3: Face suitability (in Object mode)
         is_valid, error_msg = validate_wall_face(obj, face_idx)
@@ -171,7 +195,8 @@ class CITYJSON_OT_place_window_modal(Operator):
         
         # Calculate gravity-aligned face matrix (in Object mode for stability)
         try:
-            self._face_matrix = get_face_ortho_matrix(obj, face_idx)
+            self._set_face_matrix(get_face_ortho_matrix(obj, face_idx))
+            prime_face_cache(obj, face_idx)
             # Flatten matrix for property storage
             self.face_matrix_flat = [v for row in self._face_matrix for v in row]
         except Exception as exc:
@@ -180,8 +205,9 @@ class CITYJSON_OT_place_window_modal(Operator):
             return {'CANCELLED'}
         
         # Update context
-        context.scene.cityjson_editor.active_building = obj
-        context.scene.cityjson_editor.active_face_index = face_idx
+        settings = context.scene.cityjson_editor
+        settings.active_building = obj
+        settings.active_face_index = face_idx
         
         # Initialize state
         self.has_first_point = False
@@ -217,11 +243,14 @@ class CITYJSON_OT_place_window_modal(Operator):
         if not context.region_data:
             return {'PASS_THROUGH'}
         
-        context.area.tag_redraw()
+        # Events the state machine doesn't handle are consumed as before,
+        # without touching the matrix state
+        if event.type not in _MODAL_EVENTS:
+            return {'RUNNING_MODAL'}
         
         # Reconstruct matrix if needed
         if self._face_matrix is None and self.face_matrix_flat:
-            self._face_matrix = self._unflatten_matrix(self.face_matrix_flat)
+            self._set_face_matrix(self._unflatten_matrix(self.face_matrix_flat))
         
         # Event: Mouse movement (update preview)
         if event.type == 'MOUSEMOVE':
@@ -230,16 +259,18 @@ class CITYJSON_OT_place_window_modal(Operator):
                 event,
                 self._building_obj,
                 self.target_face_idx,
-                self._face_matrix
+                self._face_matrix,
+                self._face_matrix_inv
             )
-            if point:
+            current = self.current_point_local
+            if point and (abs(point[0] - current[0]) > _PREVIEW_MOVE_EPS
+                          or abs(point[1] - current[1]) > _PREVIEW_MOVE_EPS):
                 # Update current point for preview
-                if self.click_count == 0:
-                    # Before first click - show point indicator
-                    self.current_point_local = point
-                else:
-                    # After first click - dragging rectangle
-                    self.current_point_local = point
+                self.current_point_local = point
+                # Only the dragged rectangle (after first click) is drawn;
+                # a stationary cursor needs no viewport redraw
+                if self.click_count == 1:
+                    context.area.tag_redraw()
         
         # Event: Left mouse button (corner selection)
         elif event.type == 'LEFTMOUSE' and event.value == 'PRESS':
@@ -248,7 +279,8 @@ class CITYJSON_OT_place_window_modal(Operator):
                 event,
                 self._building_obj,
                 self.target_face_idx,
-                self._face_matrix
+                self._face_matrix,
+                self._face_matrix_inv
             )
             
             if not point:
@@ -261,6 +293,7 @@ class CITYJSON_OT_place_window_modal(Operator):
                 self.current_point_local = point
                 self.has_first_point = True
                 self.click_count = 1
+                context.area.tag_redraw()
                 self.report({'INFO'}, "Click second corner to finish...")
             else:
                 # Second click: Create window
@@ -268,20 +301,21 @@ class CITYJSON_OT_place_window_modal(Operator):
                 
                 # Already in Object mode (we stayed in it since invoke)
                 success = self._create_window_object(context)
+                # _cleanup clears the building reference
+                obj = self._building_obj
                 self._cleanup(context)
                 
                 if success:
                     self.report({'INFO'}, "Window created successfully")
                     
-                    # Debug output (safe to access after cleanup)
-                    obj = self._building_obj
-                    try:
-                        surfaces = obj.get(CJProps.SURFACES, [])
-                        print(f"\\n[CityJSONEditor] Window added to building '{obj.name}'")
-                        print(f"[CityJSONEditor] Total surfaces: {len(surfaces)}")
-                        print(f"[CityJSONEditor] LOD: {obj.get(CJProps.LOD)}")
-                    except Exception:
-                        pass
+                    if _DEBUG:
+                        try:
+                            surfaces = obj.get(CJProps.SURFACES, [])
+                            _dprint(f"\\n[CityJSONEditor] Window added to building '{obj.name}'")
+                            _dprint(f"[CityJSONEditor] Total surfaces: {len(surfaces)}")
+                            _dprint(f"[CityJSONEditor] LOD: {obj.get(CJProps.LOD)}")
+                        except Exception:
+                            pass
                     
                     return {'FINISHED'}
                 else:
@@ -295,15 +329,16 @@ class CITYJSON_OT_place_window_modal(Operator):
         
         return {'RUNNING_MODAL'}
     
+    def _set_face_matrix(self, matrix):
+        """Store the face matrix with its NumPy copy and inverse, computed once per placement"""
+        self._face_matrix = matrix
+        self._face_matrix_np = np.array(matrix, dtype=np.float64)
+        self._face_matrix_inv = invert_ortho_affine(matrix)
+    
     def _unflatten_matrix(self, flat):
         """Convert flat 16-element array back to 4x4 Matrix"""
-        from mathutils import Matrix
-        return Matrix((
-            (flat[0], flat[1], flat[2], flat[3]),
-            (flat[4], flat[5], flat[6], flat[7]),
-            (flat[8], flat[9], flat[10], flat[11]),
-            (flat[12], flat[13], flat[14], flat[15])
-        ))
+        flat = tuple(flat)
+        return Matrix((flat[0:4], flat[4:8], flat[8:12], flat[12:16]))
     
     def _create_window_object(self, context):
         """
@@ -328,8 +363,8 @@ class CITYJSON_OT_place_window_modal(Operator):
             
             # Step 1: Calculate rectangle dimensions
             width, height, center_u, center_v = calculate_rectangle_dimensions(
-                Vector(self.first_point_local),
-                Vector(self.current_point_local)
+                self.first_point_local,
+                self.current_point_local
             )
             
             # Validation: Minimum size
@@ -350,19 +385,19 @@ class CITYJSON_OT_place_window_modal(Operator):
             surfaces = id_prop_to_dict(surfaces)
             
             # Debug logging (safe in Object mode before Edit mode transition)
-            print(f"\n[CityJSONEditor] ========== WINDOW CREATION START ==========")
-            print(f"[CityJSONEditor] Building: {obj.name}")
-            print(f"[CityJSONEditor] Total surfaces in building: {len(surfaces)}")
-            print(f"[CityJSONEditor] Selected face index: {self.target_face_idx}")
-            print(f"[CityJSONEditor] Total polygons: {len(obj.data.polygons)}")
-            print(f"[CityJSONEditor] Semantic attribute exists: {attr is not None}")
+            _dprint(f"\n[CityJSONEditor] ========== WINDOW CREATION START ==========")
+            _dprint(f"[CityJSONEditor] Building: {obj.name}")
+            _dprint(f"[CityJSONEditor] Total surfaces in building: {len(surfaces)}")
+            _dprint(f"[CityJSONEditor] Selected face index: {self.target_face_idx}")
+            _dprint(f"[CityJSONEditor] Total polygons: {len(obj.data.polygons)}")
+            _dprint(f"[CityJSONEditor] Semantic attribute exists: {attr is not None}")
             if attr:
-                print(f"[CityJSONEditor] Attribute data length: {len(attr.data)}")
+                _dprint(f"[CityJSONEditor] Attribute data length: {len(attr.data)}")
             
             parent_idx = None
             if attr and self.target_face_idx >= 0 and self.target_face_idx < len(attr.data):
                 parent_idx = attr.data[self.target_face_idx].value
-                print(f"[CityJSONEditor] Read parent semantic index from face {self.target_face_idx}: {parent_idx}")
+                _dprint(f"[CityJSONEditor] Read parent semantic index from face {self.target_face_idx}: {parent_idx}")
                 
                 if parent_idx < 0 or parent_idx >= len(surfaces):
                     print(f"[CityJSONEditor] ⚠️  WARNING: Invalid parent_idx {parent_idx} (must be 0-{len(surfaces)-1})")
@@ -370,8 +405,9 @@ class CITYJSON_OT_place_window_modal(Operator):
                 elif parent_idx is not None:
                     parent_surface = surfaces[parent_idx]
                     parent_type = parent_surface.get("type", "Unknown") if isinstance(parent_surface, dict) else "Unknown"
-                    print(f"[CityJSONEditor] ✓ Parent surface [{parent_idx}]: {parent_type}")
-                    print(f"[CityJSONEditor] Parent surface data: {parent_surface}")
+                    _dprint(f"[CityJSONEditor] ✓ Parent surface [{parent_idx}]: {parent_type}")
+                    if _DEBUG:
+                        _dprint(f"[CityJSONEditor] Parent surface data: {parent_surface}")
             else:
                 print(f"[CityJSONEditor] ⚠️  Cannot read parent semantic index")
                 print(f"[CityJSONEditor]    - Attribute exists: {attr is not None}")
@@ -379,70 +415,64 @@ class CITYJSON_OT_place_window_modal(Operator):
                 print(f"[CityJSONEditor]    - Attribute data length: {len(attr.data) if attr else 0}")
 
             
-            # Step 3: Switch to Edit mode and get BMesh
-            bpy.ops.object.mode_set(mode='EDIT')
-            
-            bm = bmesh.from_edit_mesh(obj.data)
-            bm.faces.ensure_lookup_table()
-            bm.verts.ensure_lookup_table()
-            
             # Step 3: Calculate 4 corners in world space
             hw, hh = width / 2.0, height / 2.0
-            corners_local = [
-                Vector((center_u - hw, center_v - hh, 0)),  # Bottom-left
-                Vector((center_u + hw, center_v - hh, 0)),  # Bottom-right
-                Vector((center_u + hw, center_v + hh, 0)),  # Top-right
-                Vector((center_u - hw, center_v + hh, 0))   # Top-left
-            ]
-            corners_world = [self._face_matrix @ c for c in corners_local]
-            
-            # Step 4: Add vertices to BMesh
-            new_verts = [bm.verts.new(c) for c in corners_world]
-            
-            # Step 5: Create face (quad)
-            try:
-                new_face = bm.faces.new(new_verts)
-            except ValueError as e:
-                self.report({'ERROR'}, f"Cannot create face: {e}")
-                bm.free()
-                return False
-            
-            # Step 6: Update mesh and get new face index
-            bmesh.update_edit_mesh(obj.data)
-            
-            # CRITICAL: Switch to Object mode to get proper face index
-            bpy.ops.object.mode_set(mode='OBJECT')
-            
-            # Force mesh update to ensure attribute data array is resized
-            obj.data.update()
-            
-            # Find the new face index (last face added)
-            new_face_idx = len(obj.data.polygons) - 1
-            
-            print(f"[CityJSONEditor] New window face index: {new_face_idx}")
-            print(f"[CityJSONEditor] Total faces after adding window: {len(obj.data.polygons)}")
+            # Bottom-left, bottom-right, top-right, top-left
+            corners_world = _rect_corners_world(
+                self._face_matrix_np,
+                center_u - hw, center_v - hh,
+                center_u + hw, center_v + hh
+            ).tolist()
+            
+            # Step 4-5: Append the quad to the mesh data directly (Object mode),
+            # without an Edit mode round trip or a BMesh of the whole building
+            mesh = obj.data
+            v0 = len(mesh.vertices)
+            l0 = len(mesh.loops)
+            # index of the window face, known before it is added
+            new_face_idx = len(mesh.polygons)
+            mesh.vertices.add(4)
+            mesh.loops.add(4)
+            mesh.polygons.add(1)
+            for i, co in enumerate(corners_world):
+                mesh.vertices[v0 + i].co = co
+                mesh.loops[l0 + i].vertex_index = v0 + i
+            poly = mesh.polygons[new_face_idx]
+            poly.loop_start = l0
+            # Blender < 4.0 stores the loop count per polygon; newer versions derive it
+            if poly.loop_total != 4:
+                poly.loop_total = 4
+            
+            # Step 6: Build the quad's edges and resize attribute data
+            mesh.update(calc_edges=True)
+            
+            _dprint(f"[CityJSONEditor] New window face index: {new_face_idx}")
+            _dprint(f"[CityJSONEditor] Total faces after adding window: {new_face_idx + 1}")
             
             # Step 7: Get or create semantic attribute
             if attr is None:
-                print(f"[CityJSONEditor] Creating new semantic attribute...")
+                _dprint(f"[CityJSONEditor] Creating new semantic attribute...")
                 attr = obj.data.attributes.new(
                     name=CJProps.SEMANTIC_INDEX,
                     type='INT',
                     domain='FACE'
                 )
             else:
-                print(f"[CityJSONEditor] Refreshing semantic attribute reference...")
+                _dprint(f"[CityJSONEditor] Refreshing semantic attribute reference...")
                 # Refresh attribute reference after mesh update
                 attr = obj.data.attributes.get(CJProps.SEMANTIC_INDEX)
             
+            # resolved once; reused for the assignment and its verification below
+            attr_data = attr.data
+            
             # Verify attribute data size matches polygon count
-            print(f"[CityJSONEditor] Attribute data size: {len(attr.data)}")
-            print(f"[CityJSONEditor] Polygon count: {len(obj.data.polygons)}")
+            _dprint(f"[CityJSONEditor] Attribute data size: {len(attr_data)}")
+            _dprint(f"[CityJSONEditor] Polygon count: {len(obj.data.polygons)}")
             
-            if len(attr.data) != len(obj.data.polygons):
+            if len(attr_data) != len(obj.data.polygons):
                 print(f"[CityJSONEditor] ❌ ERROR: Attribute size mismatch!")
                 print(f"[CityJSONEditor]    Expected: {len(obj.data.polygons)}")
-                print(f"[CityJSONEditor]    Got: {len(attr.data)}")
+                print(f"[CityJSONEditor]    Got: {len(attr_data)}")
                 self.report({'ERROR'}, "Attribute size mismatch after adding face")
                 return False
             
@@ -450,9 +480,9 @@ class CITYJSON_OT_place_window_modal(Operator):
             window_idx = len(surfaces)
             window_id = f"Window_{uuid.uuid4().hex[:8]}"
             
-            print(f"[CityJSONEditor] Creating Window semantic surface...")
-            print(f"[CityJSONEditor] Window index in surfaces array: {window_idx}")
-            print(f"[CityJSONEditor] Window ID: {window_id}")
+            _dprint(f"[CityJSONEditor] Creating Window semantic surface...")
+            _dprint(f"[CityJSONEditor] Window index in surfaces array: {window_idx}")
+            _dprint(f"[CityJSONEditor] Window ID: {window_id}")
             
             new_surface = {
                 "type": "Window",
@@ -462,38 +492,38 @@ class CITYJSON_OT_place_window_modal(Operator):
             
             if parent_idx is not None:
                 new_surface["parent"] = parent_idx
-                print(f"[CityJSONEditor] ✓ Setting parent: {parent_idx}")
+                _dprint(f"[CityJSONEditor] ✓ Setting parent: {parent_idx}")
                 
                 # Update parent's children array
                 parent_surface = surfaces[parent_idx]
                 if isinstance(parent_surface, dict):
-                    children = parent_surface.get("children", [])
+                    children = parent_surface.setdefault("children", [])
                     if not isinstance(children, list):
                         children = []
                         parent_surface["children"] = children
-                    if window_idx not in children:
-                        children.append(window_idx)
-                        print(f"[CityJSONEditor] ✓ Added window to parent's children array: {children}")
+                    # window_idx == len(surfaces) is new, so it can't be listed yet
+                    children.append(window_idx)
+                    _dprint(f"[CityJSONEditor] ✓ Added window to parent's children array: {children}")
             else:
                 print(f"[CityJSONEditor] ⚠️  WARNING: No parent set (window orphaned!)")
             
             surfaces.append(new_surface)
-            print(f"[CityJSONEditor] Window surface added to surfaces array (total: {len(surfaces)})")
+            _dprint(f"[CityJSONEditor] Window surface added to surfaces array (total: {len(surfaces)})")
             
             # Step 9: Assign semantic index to new face (already in Object mode)
-            print(f"[CityJSONEditor] Assigning semantic index to window face...")
-            print(f"[CityJSONEditor] Face index: {new_face_idx}")
-            print(f"[CityJSONEditor] Semantic index (Window): {window_idx}")
+            _dprint(f"[CityJSONEditor] Assigning semantic index to window face...")
+            _dprint(f"[CityJSONEditor] Face index: {new_face_idx}")
+            _dprint(f"[CityJSONEditor] Semantic index (Window): {window_idx}")
             
             try:
-                obj.data.attributes[CJProps.SEMANTIC_INDEX].data[new_face_idx].value = window_idx
+                attr_data[new_face_idx].value = window_idx
                 
                 # Verify assignment
-                verify_idx = obj.data.attributes[CJProps.SEMANTIC_INDEX].data[new_face_idx].value
+                verify_idx = attr_data[new_face_idx].value
                 
                 if verify_idx == window_idx:
-                    print(f"[CityJSONEditor] ✓ SUCCESS: Semantic index assigned and verified!")
-                    print(f"[CityJSONEditor]    Face {new_face_idx} → Semantic index {verify_idx}")
+                    _dprint(f"[CityJSONEditor] ✓ SUCCESS: Semantic index assigned and verified!")
+                    _dprint(f"[CityJSONEditor]    Face {new_face_idx} → Semantic index {verify_idx}")
                 else:
                     print(f"[CityJSONEditor] ❌ ERROR: Verification mismatch!")
                     print(f"[CityJSONEditor]    Expected: {window_idx}, Got: {verify_idx}")
@@ -505,26 +535,26 @@ class CITYJSON_OT_place_window_modal(Operator):
                 return False
             
             # Step 10: Update object properties
-            print(f"[CityJSONEditor] Updating object properties...")
-            print(f"[CityJSONEditor] Surfaces array length: {len(surfaces)}")
-            print(f"[CityJSONEditor] Last surface in array: {surfaces[-1]}")
-            
-            # Force conversion to plain Python types (avoid Blender ID properties)
-            surfaces_clean = id_prop_to_dict(surfaces)
-            
-            obj[CJProps.SURFACES] = surfaces_clean
+            _dprint(f"[CityJSONEditor] Updating object properties...")
+            _dprint(f"[CityJSONEditor] Surfaces array length: {len(surfaces)}")
+            if _DEBUG:
+                _dprint(f"[CityJSONEditor] Last surface in array: {surfaces[-1]}")
+            
+            # surfaces were converted to plain Python types in Step 2 and only
+            # plain dicts/lists were added since, so they can be stored directly
+            obj[CJProps.SURFACES] = surfaces
             obj[CJProps.DIRTY] = True
             obj[CJProps.LOD] = 3.0  # Mark as LOD3
             
             # Verify storage
-            stored = obj.get(CJProps.SURFACES, [])
-            print(f"[CityJSONEditor] Verification: Stored surfaces count = {len(stored)}")
-            if len(stored) > 0:
-                print(f"[CityJSONEditor] Last stored surface: {stored[-1]}")
-            
-            # Step 11: Assign material (back to Edit mode for material ops)
-            bpy.ops.object.mode_set(mode='EDIT')
-            
+            if _DEBUG:
+                stored = obj.get(CJProps.SURFACES, [])
+                _dprint(f"[CityJSONEditor] Verification: Stored surfaces count = {len(stored)}")
+                if len(stored) > 0:
+                    _dprint(f"[CityJSONEditor] Last stored surface: {stored[-1]}")
+            
+            # Step 11: Assign material (still in Object mode; slot and face index
+            # are written through the data API, no selection or slot operators)
             mat = Material(
                 type="Window",
                 newObject=obj,
@@ -539,23 +569,18 @@ class CITYJSON_OT_place_window_modal(Operator):
             )
             mat.createMaterial()
             mat.setColor()
-            mat.addMaterialToFace(obj.active_material_index, new_face_idx)
+            mat.assignMaterials(new_face_idx, obj.active_material_index)
             
-            # Step 13: Back to Object mode
-            bpy.ops.object.mode_set(mode='OBJECT')
-            
-            # Force viewport update
-            for area in context.screen.areas:
-                if area.type == 'VIEW_3D':
-                    area.tag_redraw()
+            # Other viewports redraw from the mesh update's depsgraph notification
+            context.area.tag_redraw()
             
             # Success message
-            print(f"[CityJSONEditor] ========================================")
-            print(f"[CityJSONEditor] ✓ WINDOW CREATION COMPLETE")
-            print(f"[CityJSONEditor] Dimensions: {width:.2f}m × {height:.2f}m")
-            print(f"[CityJSONEditor] Face: {new_face_idx}, Semantic: {window_idx}")
-            print(f"[CityJSONEditor] Parent: {parent_idx}")
-            print(f"[CityJSONEditor] ==========================================\n")
+            _dprint(f"[CityJSONEditor] ========================================")
+            _dprint(f"[CityJSONEditor] ✓ WINDOW CREATION COMPLETE")
+            _dprint(f"[CityJSONEditor] Dimensions: {width:.2f}m × {height:.2f}m")
+            _dprint(f"[CityJSONEditor] Face: {new_face_idx}, Semantic: {window_idx}")
+            _dprint(f"[CityJSONEditor] Parent: {parent_idx}")
+            _dprint(f"[CityJSONEditor] ==========================================\n")
             
             self.report({'INFO'}, f"Window added: {width:.2f}m × {height:.2f}m")
             
@@ -590,50 +615,77 @@ class CITYJSON_OT_place_window_modal(Operator):
         settings = context.scene.cityjson_editor
         if not settings.show_preview:
             return
+        # the fill is drawn at 30% of the outline alpha; skip what can't show up
+        alpha = settings.preview_alpha
+        fill_alpha = alpha * 0.3
+        if alpha < _MIN_VISIBLE_ALPHA:
+            return
         
         try:
             # Get rectangle corners in local space
-            p1 = Vector(self.first_point_local)
-            p2 = Vector(self.current_point_local)
-            
-            corners_local = [
-                Vector((p1.x, p1.y, 0)),
-                Vector((p2.x, p1.y, 0)),
-                Vector((p2.x, p2.y, 0)),
-                Vector((p1.x, p2.y, 0))
-            ]
-            
-            # Transform to world space
-            corners_world = [self._face_matrix @ c for c in corners_local]
+            p1 = self.first_point_local
+            p2 = self.current_point_local
+            
+            # Setup shader (shared by all placements; builtin shaders live for the session)
+            shader = CITYJSON_OT_place_window_modal._cached_shader
+            if shader is None:
+                shader = gpu.shader.from_builtin('UNIFORM_COLOR')
+                CITYJSON_OT_place_window_modal._cached_shader = shader
+            
+            # Rebuild the batches only when the rectangle changed since the last redraw
+            key = (tuple(p1), tuple(p2))
+            if key != self._preview_key or self._preview_batches is None:
+                # Transform to world space; the (4, 3) float32 array fills the
+                # vertex buffer through the buffer protocol, no list of tuples
+                corners_world = np.ascontiguousarray(_rect_corners_world(
+                    self._face_matrix_np, p1[0], p1[1], p2[0], p2[1]
+                ), dtype=np.float32)
+                self._preview_batches = self._build_preview_batches(corners_world)
+                self._preview_key = key
+            batch_outline, batch_fill = self._preview_batches
+            
+            # Bound once; both draws below only change the color uniform
+            shader.bind()
             
-            # Setup shader
-            shader = gpu.shader.from_builtin('UNIFORM_COLOR')
+            preview_color = tuple(settings.preview_color)
             
             # Draw outline
             gpu.state.line_width_set(2.0)
-            batch_outline = batch_for_shader(
-                shader,
-                'LINE_LOOP',
-                {"pos": corners_world}
-            )
-            shader.bind()
-            color = (*settings.preview_color, settings.preview_alpha)
-            shader.uniform_float("color", color)
+            shader.uniform_float("color", (*preview_color, alpha))
             batch_outline.draw(shader)
             
             # Draw fill (semi-transparent)
-            batch_fill = batch_for_shader(
-                shader,
-                'TRI_FAN',
-                {"pos": corners_world}
-            )
-            fill_color = (*settings.preview_color, settings.preview_alpha * 0.3)
-            shader.uniform_float("color", fill_color)
-            batch_fill.draw(shader)
+            if fill_alpha >= _MIN_VISIBLE_ALPHA:
+                shader.uniform_float("color", (*preview_color, fill_alpha))
+                batch_fill.draw(shader)
             
         except Exception as exc:
             print(f"[CityJSONEditor] GPU draw error: {exc}")
     
+    @classmethod
+    def _build_preview_batches(cls, corners_world):
+        """
+        Outline and fill batches for the preview rectangle.
+        
+        Both batches share one vertex buffer with the 4 corners; the
+        line/triangle index buffers never change and are built only once.
+        """
+        if cls._preview_format is None:
+            fmt = gpu.types.GPUVertFormat()
+            fmt.attr_add(id="pos", comp_type='F32', len=3, fetch_mode='FLOAT')
+            cls._preview_format = fmt
+            cls._preview_ibos = (
+                gpu.types.GPUIndexBuf(type='LINES', seq=_PREVIEW_OUTLINE_INDICES),
+                gpu.types.GPUIndexBuf(type='TRIS', seq=_PREVIEW_FILL_INDICES)
+            )
+        vbo = gpu.types.GPUVertBuf(format=cls._preview_format, len=4)
+        vbo.attr_fill(id="pos", data=corners_world)
+        ibo_outline, ibo_fill = cls._preview_ibos
+        return (
+            gpu.types.GPUBatch(type='LINES', buf=vbo, elem=ibo_outline),
+            gpu.types.GPUBatch(type='TRIS', buf=vbo, elem=ibo_fill)
+        )
+    
     def _cleanup(self, context):
         """
         Cleanup modal state and GPU handlers.
@@ -653,12 +705,18 @@ class CITYJSON_OT_place_window_modal(Operator):
             self._draw_handle = None
         
         # Clear context
-        context.scene.cityjson_editor.active_building = None
-        context.scene.cityjson_editor.active_face_index = -1
+        settings = context.scene.cityjson_editor
+        settings.active_building = None
+        settings.active_face_index = -1
         
         # Clear internal state
         self._building_obj = None
         self._face_matrix = None
+        self._face_matrix_np = None
+        self._face_matrix_inv = None
+        self._preview_key = None
+        self._preview_batches = None
+        clear_face_cache()
         
         # Redraw viewport
         context.area.tag_redraw()
@@ -11,7 +11,7 @@ Mathematical guarantee: Windows always align parallel to ground (World Z).
 """
 
 import bpy
-import bmesh
+import math
 from mathutils import Vector, Matrix
 from mathutils.geometry import intersect_ray_tri
 from bpy_extras import view3d_utils
@@ -25,6 +25,8 @@ def get_face_ortho_matrix(obj, face_index):
     This is CRITICAL for ensuring windows are always upright, regardless
     of wall angle. The tangent (X) axis is forced to be horizontal (parallel
     to world XY plane), and bitangent (Y) points upward on the wall surface.
+    On roof/floor faces the tangent is world X projected onto the face, so
+    the basis stays orthonormal for slightly tilted faces too.
     
     Coordinate system:
         X axis = Horizontal (tangent, parallel to ground)
@@ -44,56 +46,108 @@ def get_face_ortho_matrix(obj, face_index):
         local_point = Vector((0.5, 1.0, 0))  # 0.5m right, 1m up
         world_point = matrix @ local_point
     """
-    # BMesh for face access
-    bm = bmesh.new()
-    bm.from_mesh(obj.data)
-    bm.faces.ensure_lookup_table()
-    
-    if face_index < 0 or face_index >= len(bm.faces):
-        bm.free()
+    # Read the face straight from the mesh data (no BMesh copy of the building)
+    polygons = obj.data.polygons
+    if face_index < 0 or face_index >= len(polygons):
         raise IndexError(f"Face index {face_index} out of range")
     
-    face = bm.faces[face_index]
+    face = polygons[face_index]
+    
+    # matrix_world builds a new Matrix on every RNA access; read it once
+    matrix_world = obj.matrix_world
     
-    # 1. Transform normal to world space
-    normal_local = face.normal.copy()
-    normal_world = obj.matrix_world.to_3x3() @ normal_local
+    # 1. Transform normal to world space (the product is a new vector)
+    normal_world = matrix_world.to_3x3() @ face.normal
     normal_world.normalize()
     
-    # 2. Calculate tangent (X axis) - MUST be horizontal
-    world_up = Vector((0, 0, 1))
+    nx, ny, nz = normal_world
     
-    # Special case: Face is horizontal (roof/floor)
-    if abs(normal_world.dot(world_up)) > 0.99:
-        # For horizontal faces, use world X as tangent
-        tangent = Vector((1, 0, 0))
+    # 2. Calculate tangent (X axis) - MUST be horizontal
+    # Special case: Face is horizontal (roof/floor); |n . world_up| == |nz|
+    if abs(nz) > 0.99:
+        # For horizontal faces, use world X projected onto the face plane
+        # (x - (x . n) n) so the tangent stays perpendicular to tilted roofs
+        tx, ty, tz = 1.0 - nx * nx, -nx * ny, -nx * nz
+        inv_len = 1.0 / math.sqrt(tx * tx + ty * ty + tz * tz)
+        tx, ty, tz = tx * inv_len, ty * inv_len, tz * inv_len
     else:
-        # For walls: Cross product with world up gives horizontal line
-        tangent = world_up.cross(normal_world)
-        tangent.normalize()
+        # For walls: world_up x n = (-ny, nx, 0) gives the horizontal line
+        inv_len = 1.0 / math.sqrt(nx * nx + ny * ny)
+        tx, ty, tz = -ny * inv_len, nx * inv_len, 0.0
     
     # 3. Calculate bitangent (Y axis) - Points upward on wall
-    bitangent = normal_world.cross(tangent)
-    bitangent.normalize()
+    # n x t
+    bx, by, bz = ny * tz - nz * ty, nz * tx - nx * tz, nx * ty - ny * tx
+    inv_len = 1.0 / math.sqrt(bx * bx + by * by + bz * bz)
+    bx, by, bz = bx * inv_len, by * inv_len, bz * inv_len
     
-    # 4. Calculate face center in world space
-    center_local = face.calc_center_median()
-    center_world = obj.matrix_world @ center_local
+    # 4. Calculate face center in world space (polygon center = vertex mean)
+    cx, cy, cz = matrix_world @ face.center
     
     # 5. Construct 4x4 matrix (column-major order)
     # Each column is an axis vector + position
     matrix = Matrix((
-        (tangent.x,    bitangent.x,    normal_world.x,    center_world.x),
-        (tangent.y,    bitangent.y,    normal_world.y,    center_world.y),
-        (tangent.z,    bitangent.z,    normal_world.z,    center_world.z),
-        (0.0,          0.0,            0.0,               1.0)
+        (tx,     bx,    nx,    cx),
+        (ty,     by,    ny,    cy),
+        (tz,     bz,    nz,    cz),
+        (0.0,    0.0,   0.0,   1.0)
     ))
     
-    bm.free()
     return matrix
 
 
-def mouse_to_face_local_coords(context, event, obj, face_index, face_matrix):
+def invert_ortho_affine(matrix):
+    """
+    Invert a rotation + translation matrix such as get_face_ortho_matrix() returns.
+    
+    Only valid when the 3x3 part is orthonormal: get_face_ortho_matrix()
+    builds it from the unit normal n, a unit tangent t perpendicular to n
+    and b = n x t. Its inverse is then the transpose and the translation
+    becomes -R^T @ t; no general 4x4 inversion is needed.
+    """
+    rot_t = matrix.to_3x3().transposed()
+    inv = rot_t.to_4x4()
+    inv.translation = -(rot_t @ matrix.translation)
+    return inv
+
+
+# World-space triangle fan of the face under interactive placement, keyed by
+# (object pointer, face index). Filled by prime_face_cache() when a modal
+# session starts and dropped by clear_face_cache() when it ends; object and
+# face stay fixed in between, so MOUSEMOVE events reuse it.
+_FACE_CACHE = {}
+
+
+def _face_triangles_world(obj, face_index):
+    """World-space triangle fan (v0, vi, vi+1) of a mesh face, or None if the index is invalid"""
+    mesh = obj.data
+    if face_index < 0 or face_index >= len(mesh.polygons):
+        return None
+    
+    mesh_verts = mesh.vertices
+    matrix_world = obj.matrix_world
+    verts_world = [matrix_world @ mesh_verts[i].co for i in mesh.polygons[face_index].vertices]
+    
+    # Triangulate face (handles ngons)
+    return tuple(
+        (verts_world[0], verts_world[i], verts_world[i + 1])
+        for i in range(1, len(verts_world) - 1)
+    )
+
+
+def prime_face_cache(obj, face_index):
+    """Cache the face's world-space triangles for the following mouse_to_face_local_coords calls"""
+    _FACE_CACHE.clear()
+    tris = _face_triangles_world(obj, face_index)
+    if tris is not None:
+        _FACE_CACHE[(obj.as_pointer(), face_index)] = tris
+
+
+def clear_face_cache():
+    _FACE_CACHE.clear()
+
+
+def mouse_to_face_local_coords(context, event, obj, face_index, face_matrix, face_matrix_inv=None):
     """
     Convert 2D mouse screen coordinates to 3D face-local coordinates.
     
@@ -106,6 +160,8 @@ def mouse_to_face_local_coords(context, event, obj, face_index, face_matrix):
         obj (bpy.types.Object): Target object
         face_index (int): Target face index
         face_matrix (Matrix): Face transform matrix from get_face_ortho_matrix()
+        face_matrix_inv (Matrix, optional): Precomputed inverse of face_matrix;
+            callers on the MOUSEMOVE path pass it to avoid inverting per event
     
     Returns:
         Vector or None: (u, v, 0) in face-local space, or None if ray miss
@@ -124,24 +180,12 @@ def mouse_to_face_local_coords(context, event, obj, face_index, face_matrix):
     ray_origin = view3d_utils.region_2d_to_origin_3d(region, rv3d, coord)
     ray_direction = view3d_utils.region_2d_to_vector_3d(region, rv3d, coord)
     
-    # Get face vertices in world space
-    bm = bmesh.new()
-    bm.from_mesh(obj.data)
-    bm.faces.ensure_lookup_table()
-    
-    if face_index < 0 or face_index >= len(bm.faces):
-        bm.free()
-        return None
-    
-    face = bm.faces[face_index]
-    verts_world = [obj.matrix_world @ v.co for v in face.verts]
-    
-    # Triangulate face (handles ngons)
-    tris = []
-    for i in range(1, len(verts_world) - 1):
-        tris.append((verts_world[0], verts_world[i], verts_world[i + 1]))
-    
-    bm.free()
+    # Face triangles in world space: primed for a modal session, else read from the mesh
+    tris = _FACE_CACHE.get((obj.as_pointer(), face_index))
+    if tris is None:
+        tris = _face_triangles_world(obj, face_index)
+        if tris is None:
+            return None
     
     # Ray-triangle intersection test
     intersection_world = None
@@ -155,7 +199,7 @@ def mouse_to_face_local_coords(context, event, obj, face_index, face_matrix):
         return None
     
     # Transform world coords → local coords
-    matrix_inv = face_matrix.inverted()
+    matrix_inv = face_matrix_inv if face_matrix_inv is not None else invert_ortho_affine(face_matrix)
     intersection_local = matrix_inv @ intersection_world
     
     # Clamp Z to 0 (should be on face plane)
@@ -312,6 +356,9 @@ def get_building_lod3_collection(building_obj):
     return building_col
 
 
+_BUILDING_TYPES = frozenset((CJTypes.BUILDING, "BuildingPart"))
+
+
 def validate_wall_face(obj, face_index):
     """
     Validate if a face is suitable for window placement.
@@ -340,7 +387,7 @@ def validate_wall_face(obj, face_index):
         return False, "No object provided"
     
     obj_type = obj.get(CJProps.TYPE, "")
-    if obj_type != CJTypes.BUILDING and obj_type != "BuildingPart":
+    if obj_type not in _BUILDING_TYPES:
         return False, f"Object is not a Building (type: {obj_type})"
     
     # Check 2: Valid face index?
@@ -352,9 +399,13 @@ def validate_wall_face(obj, face_index):
     
     face = obj.data.polygons[face_index]
     
+    # Check 4 (cheap, so first): Sufficient area?
+    if face.area < 0.1:  # 0.1 m² minimum
+        return False, f"Face too small ({face.area:.3f} m²). Minimum area: 0.1 m²"
+    
     # Check 3: Is it a WallSurface? (optional, only if semantic data exists)
-    surfaces = obj.get(CJProps.SURFACES, [])
     attr = obj.data.attributes.get(CJProps.SEMANTIC_INDEX)
+    surfaces = obj.get(CJProps.SURFACES, []) if attr is not None else None
     
     if attr and surfaces and face_index < len(attr.data):
         semantic_idx = attr.data[face_index].value
@@ -367,13 +418,9 @@ def validate_wall_face(obj, face_index):
                 return False, f"Cannot add window to {surface_type}. Select a WallSurface."
             
             # Accept any "*WallSurface" type
-            if surface_type and "Wall" not in surface_type:
+            if surface_type and not surface_type.endswith("WallSurface"):
                 return False, f"Face is not a wall (type: {surface_type}). Select a WallSurface."
     
-    # Check 4: Sufficient area?
-    if face.area < 0.1:  # 0.1 m² minimum
-        return False, f"Face too small ({face.area:.3f} m²). Minimum area: 0.1 m²"
-    
     return True, ""
 
 
@@ -389,7 +436,11 @@ def get_building_source_id(obj):
     Returns:
         str: Source ID (e.g., "Building_123")
     """
-    return obj.get(CJProps.SOURCE_ID, obj.name.split("__")[0])
+    source_id = obj.get(CJProps.SOURCE_ID)
+    if source_id is None:
+        # only build the fallback when the property is missing
+        source_id = obj.name.partition("__")[0]
+    return source_id
 
 
 def calculate_rectangle_dimensions(point1, point2):
@@ -397,15 +448,17 @@ def calculate_rectangle_dimensions(point1, point2):
     Calculate width and height from two corner points.
     
     Args:
-        point1 (Vector): First corner (local coords)
-        point2 (Vector): Second corner (local coords)
+        point1 (sequence): First corner (local coords), Vector or (u, v[, w])
+        point2 (sequence): Second corner (local coords), Vector or (u, v[, w])
     
     Returns:
         tuple: (width: float, height: float, center_u: float, center_v: float)
     """
-    width = abs(point2.x - point1.x)
-    height = abs(point2.y - point1.y)
-    center_u = (point1.x + point2.x) / 2.0
-    center_v = (point1.y + point2.y) / 2.0
+    u1, v1 = point1[0], point1[1]
+    u2, v2 = point2[0], point2[1]
+    width = abs(u2 - u1)
+    height = abs(v2 - v1)
+    center_u = (u1 + u2) / 2.0
+    center_v = (v1 + v2) / 2.0
     
     return width, height, center_u, center_v
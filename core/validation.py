@@ -16,27 +16,38 @@ It performs structural checks in line with CityJSON specs and a few safe normali
 import json
 from pathlib import Path
 
+try:
+    # optional: not bundled with Blender, but parses large files much faster
+    import orjson
+except ImportError:
+    orjson = None
 
-def _peek_file(path: Path, max_bytes: int = 256) -> str:
-    if not path.exists():
-        return "<missing>"
-    try:
-        with path.open("rb") as fh:
-            data = fh.read(max_bytes)
-        return data.decode("utf-8", errors="replace")
-    except Exception as exc:
-        return f"<unreadable: {exc}>"
+
+def _peek_file(path: Path, max_bytes: int = 256) -> bytes:
+    # bounded read: only the head is needed to sniff the format
+    with path.open("rb") as fh:
+        return fh.read(max_bytes)
 
 
 def _ensure_json_file(path: Path) -> tuple[bool, str]:
-    if not path.exists():
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
         return False, f"File does not exist: {path}"
-    text = _peek_file(path)
-    stripped = text.lstrip()
-    if not stripped.startswith("{"):
+    except OSError as exc:
+        return False, f"Could not read file ({path}): {exc}"
+    if size == 0:
+        return False, f"File is empty: {path}"
+    try:
+        head = _peek_file(path)
+    except OSError as exc:
+        return False, f"Could not read file ({path}): {exc}"
+    stripped = head.lstrip()
+    if not stripped.startswith(b"{"):
         hint = ""
-        if stripped.startswith("<"):
+        if stripped.startswith(b"<"):
             hint = " Looks like XML/GML; export must be CityJSON."
+        text = head.decode("utf-8", errors="replace")
         return False, f"File is not JSON (first bytes: {text[:60]!r}) at {path}.{hint}"
     return True, ""
 
@@ -47,107 +58,120 @@ def validate_cityjson(path: Path) -> tuple[bool, str, dict | None]:
     if not ok:
         return False, msg, None
     try:
-        with path.open("r", encoding="utf-8") as fh:
-            data = json.load(fh)
+        if orjson is not None:
+            # orjson parses the raw bytes directly (no separate UTF-8 decode step)
+            data = orjson.loads(path.read_bytes())
+        else:
+            with path.open("r", encoding="utf-8") as fh:
+                data = json.load(fh)
     except Exception as exc:
         return False, f"Could not read CityJSON ({path}): {exc}", None
     return True, "", data
 
 
-def _normalize_cityjson_lods(data: dict) -> bool:
-    """Normalize geometry lod fields to numeric values (string -> float, missing -> 0.0)."""
-    changed = False
-    cityobjects = data.get("CityObjects", {}) or {}
-    for obj in cityobjects.values():
-        geoms = obj.get("geometry") or []
-        for geom in geoms:
-            lod_val = geom.get("lod")
-            if isinstance(lod_val, str):
-                try:
-                    geom["lod"] = float(lod_val)
-                    changed = True
-                except ValueError:
-                    geom["lod"] = 0.0
-                    changed = True
-            elif lod_val is None:
-                geom["lod"] = 0.0
-                changed = True
-    return changed
+def _normalize_lod(geom: dict) -> bool:
+    """Normalize a geometry lod field to a numeric value (string -> float, missing -> 0.0)."""
+    lod_val = geom.get("lod")
+    if isinstance(lod_val, str):
+        try:
+            geom["lod"] = float(lod_val)
+        except ValueError:
+            geom["lod"] = 0.0
+        return True
+    if lod_val is None:
+        geom["lod"] = 0.0
+        return True
+    return False
 
 
-def _normalize_semantics_values(data: dict) -> bool:
+def _normalize_semantics_values(semantics: dict) -> bool:
     """
     Ensure semantics.values is a list of lists (per CityJSON spec).
     Some exporters provide a flat list; wrap it to keep downstream code stable.
     """
-    changed = False
-    cityobjects = data.get("CityObjects", {}) or {}
-    for obj in cityobjects.values():
-        geoms = obj.get("geometry") or []
-        for geom in geoms:
-            semantics = geom.get("semantics")
-            if not semantics or not isinstance(semantics, dict):
-                continue
-            values = semantics.get("values")
-            if isinstance(values, list) and values and not isinstance(values[0], list):
-                semantics["values"] = [values]
-                changed = True
-    return changed
+    values = semantics.get("values")
+    if isinstance(values, list) and values and not isinstance(values[0], list):
+        semantics["values"] = [values]
+        return True
+    return False
 
 
-def _check_semantics(data: dict) -> tuple[bool, str]:
+def _check_semantics(co_id: str, semantics) -> tuple[bool, str]:
     """Ensure semantics are consistent when present; semantics are optional in CityJSON."""
-    cityobjects = data.get("CityObjects", {}) or {}
-    for co_id, obj in cityobjects.items():
-        geoms = obj.get("geometry") or []
-        for geom in geoms:
-            semantics = geom.get("semantics")
-            if semantics is None:
-                continue  # semantics are optional
-            if not isinstance(semantics, dict):
-                return False, f"Semantics must be an object in CityObject '{co_id}'."
-            values = semantics.get("values")
-            surfaces = semantics.get("surfaces")
-            # Accept flat list (already normalized upstream), or list-of-lists.
-            if values is not None and not isinstance(values, list):
-                return False, f"Semantics values invalid for CityObject '{co_id}'."
-            if values and isinstance(values, list):
-                first = values[0] if isinstance(values[0], list) else values
-                if not first:
-                    return False, f"Semantics values empty for CityObject '{co_id}'."
-            if values and not surfaces:
-                return False, f"Semantics surfaces missing for CityObject '{co_id}'."
+    if not isinstance(semantics, dict):
+        return False, f"Semantics must be an object in CityObject '{co_id}'."
+    values = semantics.get("values")
+    if values is None:
+        return True, ""
+    # Only the outer list is checked; nested Solid values (list of list of list)
+    # may legitimately hold empty sublists or 0 indices and are not inspected.
+    if not isinstance(values, list):
+        return False, f"Semantics values invalid for CityObject '{co_id}'."
+    if not values:
+        return False, f"Semantics values empty for CityObject '{co_id}'."
+    if not semantics.get("surfaces"):
+        return False, f"Semantics surfaces missing for CityObject '{co_id}'."
     return True, ""
 
 
-def _strip_textures(data: dict) -> bool:
-    """Strip texture/appearance content when textures are disabled."""
+def _strip_appearance(data: dict) -> bool:
+    """Strip top-level texture/appearance content when textures are disabled."""
     changed = False
     for key in ["appearance", "appearances", "materials", "textures"]:
         if key in data:
             del data[key]
             changed = True
-    cityobjects = data.get("CityObjects", {}) or {}
-    for obj in cityobjects.values():
-        geoms = obj.get("geometry") or []
-        for geom in geoms:
-            if "texture" in geom and geom["texture"] != {}:
-                geom["texture"] = {}
-                changed = True
     return changed
 
 
-def _ensure_texture_keys(data: dict) -> bool:
-    """Ensure every geometry has a 'texture' key to keep the importer stable."""
+def _scan_and_normalize(data: dict, allow_textures: bool) -> tuple[bool, str, bool]:
+    """
+    Normalize and check every geometry in a single pass over CityObjects.
+
+    Per geometry: lod -> number, flat semantics.values -> list of lists,
+    semantics consistency check, texture cleared when textures are disabled,
+    and a 'texture' key ensured to keep the importer stable.
+    Returns (ok, message, changed).
+    """
     changed = False
+    if not allow_textures and _strip_appearance(data):
+        changed = True
     cityobjects = data.get("CityObjects", {}) or {}
-    for obj in cityobjects.values():
-        geoms = obj.get("geometry") or []
-        for geom in geoms:
+    for co_id, obj in cityobjects.items():
+        for geom in obj.get("geometry") or ():
+            if _normalize_lod(geom):
+                changed = True
+            semantics = geom.get("semantics")
+            if semantics is not None:
+                if isinstance(semantics, dict) and semantics and _normalize_semantics_values(semantics):
+                    changed = True
+                sem_ok, sem_msg = _check_semantics(co_id, semantics)
+                if not sem_ok:
+                    return False, sem_msg, changed
             if "texture" not in geom:
                 geom["texture"] = {}
                 changed = True
-    return changed
+            elif not allow_textures and geom["texture"] != {}:
+                geom["texture"] = {}
+                changed = True
+    return True, "", changed
+
+
+def _write_json_atomic(path: Path, data: dict) -> None:
+    """Write data next to path and rename over it, so a failed write never truncates the original."""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    try:
+        if orjson is not None:
+            # orjson already returns UTF-8 bytes (no intermediate str)
+            tmp.write_bytes(orjson.dumps(data))
+        else:
+            # stream to the file instead of building the whole string first
+            with tmp.open("w", encoding="utf-8") as fh:
+                json.dump(data, fh)
+        tmp.replace(path)
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        raise
 
 
 def prepare_cityjson_for_import(
@@ -161,21 +185,12 @@ def prepare_cityjson_for_import(
     ok, msg, data = validate_cityjson(local_file)
     if not ok:
         return False, msg, None, False
-    changed = False
-    if _normalize_cityjson_lods(data):
-        changed = True
-    if _normalize_semantics_values(data):
-        changed = True
-    sem_ok, sem_msg = _check_semantics(data)
+    sem_ok, sem_msg, changed = _scan_and_normalize(data, allow_textures)
     if not sem_ok:
         return False, sem_msg, None, False
-    if not allow_textures and _strip_textures(data):
-        changed = True
-    if _ensure_texture_keys(data):
-        changed = True
     if changed and write_back:
         try:
-            local_file.write_text(json.dumps(data), encoding="utf-8")
+            _write_json_atomic(local_file, data)
         except Exception as exc:
             return False, f"Failed to write prepared CityJSON: {exc}", None, changed
     return True, "", data, changed
@@ -0,0 +1,28 @@
+"""
+Vertex array helpers shared by the export pipeline.
+
+Quantization and extent computation run as NumPy array operations on a
+contiguous (N, 3) float64 buffer instead of per-vertex Python loops.
+"""
+
+import numpy as np
+
+
+def quantize_vertices(vertices, scale) -> np.ndarray:
+    """Divide (N, 3) coordinates by the transform scale and round to int64 (half to even, like round())."""
+    arr = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    arr = arr / np.asarray(scale, dtype=np.float64)
+    np.rint(arr, out=arr)
+    return arr.astype(np.int64)
+
+
+def vertex_extent(vertices, scale, translate) -> list:
+    """Return [minx, miny, minz, maxx, maxy, maxz] of vertices*scale+translate, rounded to mm."""
+    # np.array always copies, so the scale/translate below can run in place
+    arr = np.array(vertices, dtype=np.float64).reshape(-1, 3)
+    if not len(arr):
+        return []
+    arr *= np.asarray(scale, dtype=np.float64)
+    arr += np.asarray(translate, dtype=np.float64)
+    bounds = arr.min(axis=0).tolist() + arr.max(axis=0).tolist()
+    return [round(val, 3) for val in bounds]
@@ -0,0 +1,45 @@
+"""Export tests; they need Blender's bpy module (e.g. the bpy wheel) and are skipped without it."""
+
+import importlib
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+bpy = pytest.importorskip("bpy")
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _export_process_cls():
+    # import the add-on's core modules as a package without running its register code
+    if "cityjson_editor" not in sys.modules:
+        pkg = types.ModuleType("cityjson_editor")
+        pkg.__path__ = [str(ROOT)]
+        sys.modules["cityjson_editor"] = pkg
+    return importlib.import_module("cityjson_editor.core.ExportProcess").ExportProcess
+
+
+@pytest.fixture
+def baseline_text():
+    baseline = {"type": "CityJSON", "version": "2.0", "CityObjects": {}, "vertices": []}
+    txt = bpy.data.texts.new("CJE_BASELINE")
+    txt.write(json.dumps(baseline))
+    yield txt
+    bpy.data.texts.remove(txt)
+
+
+def test_patch_only_without_dirty_objects_leaves_export_file(tmp_path, baseline_text):
+    ExportProcess = _export_process_cls()
+    target = tmp_path / "out.city.json"
+    target.write_text("original", encoding="utf-8")
+
+    result = ExportProcess(str(target), True, export_changed_only=True, write_patch_only=True).execute()
+
+    assert result == {'FINISHED'}
+    assert target.read_text(encoding="utf-8") == "original"
+    lines = (tmp_path / "out.city.patch.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["type"] == "CityJSON"